@@ -3,6 +3,11 @@ from pathlib import Path
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from infra.logger import print_tommy_logo
+from infra.metrics import MetricsMiddleware
+from infra.profiling import ProfilingMiddleware
+from infra.query_counter import QueryCounterMiddleware
+from infra.rate_limiter import RateLimitMiddleware
+from infra.static_assets import ImmutableStaticFiles, DIST_DIR, DIST_URL_PREFIX
 
 @asynccontextmanager
 async def lifespan(app):
@@ -13,15 +18,35 @@ async def lifespan(app):
     # Create tables - raises exception if database is unreachable or schema creation fails
     create_tables()
     log.info("Database initialized successfully")
+
+    from dal.dinosaur_dal import load_dinosaur_catalog
+    await load_dinosaur_catalog()
     print_tommy_logo()
     
     yield
     
     # Shutdown: cleanup if needed (SQLAlchemy engine handles connection pooling)
+    from infra.redis_client import async_redis_pool
+    await async_redis_pool.disconnect()  # this loop's async Redis connections
+    await log.complete()  # flush records still queued for the background log writer
 
 
 app = FastAPI(lifespan=lifespan)
 
+# Per-route request budgets (infra/rate_limiter.ROUTE_LIMITS), checked before any DB session opens
+app.add_middleware(RateLimitMiddleware)
+# SQL statements / DB time per request, N+1 warnings (infra/query_counter.py)
+app.add_middleware(QueryCounterMiddleware)
+# Admin-only, per request: `X-Profile: 1` captures a flame graph, `memory` adds an allocation delta (infra/profiling.py)
+app.add_middleware(ProfilingMiddleware)
+# Added last = outermost, so it also times rate-limited and failed requests
+app.add_middleware(MetricsMiddleware)
+
+# Content-hashed image variants (scripts/build_image_assets.py), cached as immutable.
+# Mounted before /static so it takes precedence for /static/dist/*
+if DIST_DIR.exists():
+    app.mount(DIST_URL_PREFIX, ImmutableStaticFiles(directory=str(DIST_DIR)), name="static_dist")
+
 # Mount static files - React build assets will be in static/react
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
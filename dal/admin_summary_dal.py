@@ -0,0 +1,239 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import redis
+from sqlalchemy import func, select, cast, Date
+from sqlalchemy.orm import Session
+
+from infra.logger import log
+from infra.metrics import record_cache_lookup
+from infra.redis_client import redis_client, async_redis_client
+from models import Player, PlayerSession, PlayerAnswer
+
+# Incrementally maintained KPI counters (Redis). Seeded once from the DB, then
+# bumped by the write paths, so reading the summary is O(1) in data volume.
+# An increment that cannot reach Redis is lost; the process remembers it and
+# drops SEEDED_AT_KEY with its next successful write (or re-seeds on its next
+# summary read), so the counters are rebuilt from the DB instead of drifting.
+PLAYERS_KEY = "summary:players"
+ANSWERS_KEY = "summary:answers"
+CORRECT_KEY = "summary:answers_correct"
+SEEDED_AT_KEY = "summary:seeded_at"
+DAY_KEY_TTL = 2 * 24 * 3600
+ACTIVE_DAYS = 7  # "active players" = distinct players who started a game in the last N days
+
+SUMMARY_TTL_SEC = 10  # in-process cache of the assembled summary
+
+_cached_summary: Optional[dict] = None
+_cached_at: float = 0.0
+_dropped_writes = 0  # counter updates lost while Redis was unreachable, since the last re-seed
+
+
+def _sessions_key(day: date) -> str:
+    return f"summary:sessions:{day.isoformat()}"
+
+
+def _active_key(day: date) -> str:
+    return f"summary:active:{day.isoformat()}"  # HyperLogLog of player ids
+
+
+def _counter_pipeline() -> tuple:
+    """Pipeline for counter updates; it also forces a re-seed when earlier updates were lost."""
+    pipe = async_redis_client.pipeline(transaction=False)
+    if _dropped_writes:
+        pipe.delete(SEEDED_AT_KEY)
+    return pipe, _dropped_writes
+
+
+async def _execute_counter_pipeline(pipe, dropped: int) -> None:
+    global _dropped_writes
+    try:
+        await pipe.execute()
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        _dropped_writes += 1  # Redis unavailable, re-seed once it is back
+        return
+    _dropped_writes -= dropped
+
+
+async def record_player_created() -> None:
+    pipe, dropped = _counter_pipeline()
+    pipe.incr(PLAYERS_KEY)
+    await _execute_counter_pipeline(pipe, dropped)
+
+
+async def record_answer(is_correct: bool) -> None:
+    pipe, dropped = _counter_pipeline()
+    pipe.incr(ANSWERS_KEY)
+    if is_correct:
+        pipe.incr(CORRECT_KEY)
+    await _execute_counter_pipeline(pipe, dropped)
+
+
+async def record_session_started(player_id: int) -> None:
+    today = date.today()
+    pipe, dropped = _counter_pipeline()
+    pipe.incr(_sessions_key(today))
+    pipe.expire(_sessions_key(today), DAY_KEY_TTL)
+    pipe.pfadd(_active_key(today), player_id)
+    pipe.expire(_active_key(today), (ACTIVE_DAYS + 1) * 24 * 3600)
+    await _execute_counter_pipeline(pipe, dropped)
+
+
+def invalidate_summary_counters() -> None:
+    """Force a re-seed from the DB on the next read (after deletes the totals can't be adjusted cheaply)."""
+    global _cached_summary, _dropped_writes
+    _cached_summary = None
+    try:
+        redis_client.delete(SEEDED_AT_KEY)
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        _dropped_writes += 1  # Redis unavailable, re-seed once it is back
+
+
+async def invalidate_summary_counters_async() -> None:
+    """invalidate_summary_counters for code on the event loop (does not block it on Redis)."""
+    global _cached_summary, _dropped_writes
+    _cached_summary = None
+    try:
+        await async_redis_client.delete(SEEDED_AT_KEY)
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        _dropped_writes += 1  # Redis unavailable, re-seed once it is back
+
+
+def _compute_from_db(session: Session) -> dict:
+    today = date.today()
+    today_start = datetime.combine(today, datetime.min.time())
+    active_since = today_start - timedelta(days=ACTIVE_DAYS - 1)
+    counts = {
+        "total_players": session.scalar(select(func.count()).select_from(Player)) or 0,
+        "total_answers": session.scalar(select(func.count()).select_from(PlayerAnswer)) or 0,
+        "correct_answers": session.scalar(
+            select(func.count()).select_from(PlayerAnswer).where(PlayerAnswer.is_correct.is_(True))
+        ) or 0,
+        "sessions_today": session.scalar(
+            select(func.count()).select_from(PlayerSession).where(PlayerSession.started_at >= today_start)
+        ) or 0,
+    }
+    # Distinct (player, day) pairs for the active window, to seed the per-day HyperLogLogs
+    active_by_day: dict[date, list[int]] = {}
+    for player_id, day in session.execute(
+        select(PlayerSession.player_id, cast(PlayerSession.started_at, Date))
+        .where(PlayerSession.started_at >= active_since)
+        .distinct()
+    ):
+        active_by_day.setdefault(day, []).append(player_id)
+    counts["active_by_day"] = active_by_day
+    counts["active_players"] = len({player_id for ids in active_by_day.values() for player_id in ids})
+    return counts
+
+
+async def _seed_counters(session: Session) -> dict:
+    """
+    Rebuild the counters from the DB and return the counts. Each counter is moved
+    by INCRBY (db count - value read before the scan) rather than SET, so increments
+    that land while the DB is being counted are kept instead of overwritten, and
+    nothing has to be retried on a busy game. If Redis fails after the scan the
+    counts are still returned (counters_seeded_at None), so the DB is counted once.
+    """
+    global _dropped_writes
+    today = date.today()
+    counter_keys = {
+        PLAYERS_KEY: "total_players",
+        ANSWERS_KEY: "total_answers",
+        CORRECT_KEY: "correct_answers",
+        _sessions_key(today): "sessions_today",
+    }
+    dropped = _dropped_writes
+    before = await async_redis_client.mget(*counter_keys)
+    counts = _compute_from_db(session)
+    active_by_day = counts.pop("active_by_day")
+    counts["counters_seeded_at"] = None
+
+    seeded_at = datetime.now(timezone.utc).isoformat()
+    pipe = async_redis_client.pipeline(transaction=True)
+    for (key, name), old in zip(counter_keys.items(), before):
+        pipe.incrby(key, counts[name] - int(old or 0))
+    pipe.expire(_sessions_key(today), DAY_KEY_TTL)
+    for offset in range(ACTIVE_DAYS):
+        day = today - timedelta(days=offset)
+        pipe.delete(_active_key(day))
+        if active_by_day.get(day):
+            pipe.pfadd(_active_key(day), *active_by_day[day])
+            pipe.expire(_active_key(day), (ACTIVE_DAYS + 1) * 24 * 3600)
+    pipe.set(SEEDED_AT_KEY, seeded_at)
+    try:
+        await pipe.execute()
+    except (redis.ConnectionError, redis.TimeoutError) as e:
+        log.warning(f"Could not store the admin summary counters, serving the database counts: {e}")
+        return counts
+    _dropped_writes -= dropped
+    counts["counters_seeded_at"] = seeded_at
+    log.info("Admin summary counters seeded from the database")
+    return counts
+
+
+async def _read_counters() -> Optional[dict]:
+    today = date.today()
+    active_keys = [_active_key(today - timedelta(days=offset)) for offset in range(ACTIVE_DAYS)]
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.get(SEEDED_AT_KEY)
+    pipe.mget(PLAYERS_KEY, ANSWERS_KEY, CORRECT_KEY, _sessions_key(today))
+    pipe.pfcount(*active_keys)
+    seeded_at, (players, answers, correct, sessions_today), active = await pipe.execute()
+    if not seeded_at:
+        return None
+    return {
+        "total_players": int(players or 0),
+        "total_answers": int(answers or 0),
+        "correct_answers": int(correct or 0),
+        "sessions_today": int(sessions_today or 0),
+        "active_players": int(active or 0),
+        "counters_seeded_at": seeded_at,
+    }
+
+
+async def get_admin_summary(session: Session) -> dict:
+    """
+    Dashboard KPIs. Served from an in-process cache (SUMMARY_TTL_SEC), backed by
+    Redis counters; the DB is only counted when the counters need (re-)seeding
+    (never seeded, invalidated, or this process lost updates during an outage)
+    or Redis is unavailable.
+    """
+    global _cached_summary, _cached_at
+    now = time.monotonic()
+    if _cached_summary and now - _cached_at < SUMMARY_TTL_SEC:
+        record_cache_lookup("admin_summary", True)
+        return _cached_summary
+    record_cache_lookup("admin_summary", False)
+
+    source = "counters"
+    try:
+        counts = None if _dropped_writes else await _read_counters()
+        if counts is None:
+            source = "database"
+            counts = await _seed_counters(session)
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError) as e:
+        log.warning(f"Redis unavailable for admin summary, counting in the database: {e}")
+        counts = None
+    if counts is None:
+        source = "database"
+        counts = _compute_from_db(session)
+        counts.pop("active_by_day")
+        counts["counters_seeded_at"] = None
+
+    total_answers = counts["total_answers"]
+    summary = {
+        "total_players": counts["total_players"],
+        "sessions_today": counts["sessions_today"],
+        "total_answers": total_answers,
+        "accuracy": round(counts["correct_answers"] / total_answers * 100, 2) if total_answers else 0.0,
+        "active_players": counts["active_players"],
+        "active_days": ACTIVE_DAYS,
+        "source": source,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "counters_seeded_at": counts["counters_seeded_at"],
+        "cache_ttl_seconds": SUMMARY_TTL_SEC,
+    }
+    _cached_summary = summary
+    _cached_at = now
+    return summary
@@ -1,13 +1,51 @@
+import json
+from dataclasses import dataclass, asdict
+from types import MappingProxyType
+from typing import List, Mapping, Optional
+
+from sqlalchemy import select, update, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Optional
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+
+from infra.database import SessionLocal
+from infra.http_cache import dinosaur_catalog_version
+from infra.static_assets import asset_manifest, resolve_image_path
 from models import Dinosaur, Player, player_dinosaurs
 from infra.logger import log
 
 
+@dataclass(frozen=True)
+class CatalogDinosaur:
+    id: int
+    name: str
+    image_path: str
+    description: Optional[str]
+    level: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class DinosaurCatalog:
+    """
+    Immutable snapshot of the dinosaur catalog, shared by every request in the process.
+    Built once per catalog version; readers never see a half-updated catalog
+    because a refresh swaps in a whole new snapshot.
+    """
+    version: int
+    dinosaurs: tuple[CatalogDinosaur, ...]
+    by_id: Mapping[int, CatalogDinosaur]
+    available_json: bytes  # pre-serialized /dinosaurs/available body
+
+
+_catalog: Optional[DinosaurCatalog] = None
+
+
 async def get_all_dinosaurs(session: Session) -> List[Dinosaur]:
     """
-    Get all available dinosaurs in the system.
+    Get all available dinosaurs in the system (from the DB; requests use the catalog snapshot).
     """
     try:
         dinosaurs = session.query(Dinosaur).order_by(Dinosaur.id).all()
@@ -17,95 +55,169 @@ async def get_all_dinosaurs(session: Session) -> List[Dinosaur]:
         raise
 
 
-async def get_player_dinosaurs(session: Session, player_id: int) -> List[Dinosaur]:
+def _build_catalog(session: Session, version: int) -> DinosaurCatalog:
+    rows = session.execute(
+        select(Dinosaur.id, Dinosaur.name, Dinosaur.image_path, Dinosaur.description, Dinosaur.level)
+        .order_by(Dinosaur.id)
+    ).all()
+    # image_path points at the hashed, resized variant when the asset build has run
+    dinosaurs = tuple(
+        CatalogDinosaur(row.id, row.name, resolve_image_path(row.image_path), row.description, row.level)
+        for row in rows
+    )
+    return DinosaurCatalog(
+        version=version,
+        dinosaurs=dinosaurs,
+        by_id=MappingProxyType({d.id: d for d in dinosaurs}),
+        available_json=json.dumps([d.to_dict() for d in dinosaurs], ensure_ascii=False).encode("utf-8"),
+    )
+
+
+async def get_dinosaur_catalog(session: Session) -> DinosaurCatalog:
+    """
+    Current catalog snapshot. Only touches the DB the first time and after
+    the catalog version changed (see refresh_dinosaur_catalog).
+    """
+    global _catalog
+    version = dinosaur_catalog_version.value
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        catalog = _build_catalog(session, version)
+        _catalog = catalog
+        log.info(f"Dinosaur catalog loaded: {len(catalog.dinosaurs)} dinosaurs (version {version})")
+    return catalog
+
+
+async def get_current_dinosaur_catalog() -> DinosaurCatalog:
+    """
+    Catalog snapshot for callers without a DB session: a session is opened only
+    when the snapshot is missing or outdated.
+    """
+    catalog = _catalog
+    if catalog is not None and catalog.version == dinosaur_catalog_version.value:
+        return catalog
+    with SessionLocal() as session:
+        return await get_dinosaur_catalog(session)
+
+
+async def refresh_dinosaur_catalog(session: Session) -> DinosaurCatalog:
+    """
+    Reload the catalog after the dinosaurs table changed (e.g. scripts/create_dinosaurs.py).
+    Bumping the version also invalidates the /dinosaurs/available ETag.
+    """
+    asset_manifest.cache_clear()  # pick up a re-run of scripts/build_image_assets.py too
+    dinosaur_catalog_version.bump()
+    return await get_dinosaur_catalog(session)
+
+
+async def load_dinosaur_catalog() -> None:
+    """Warm the catalog at startup. Failures are logged; the first request loads it instead."""
+    try:
+        with SessionLocal() as session:
+            await get_dinosaur_catalog(session)
+    except SQLAlchemyError as e:
+        log.warning(f"Could not preload dinosaur catalog: {e}")
+
+
+async def get_player_dinosaurs(session: Session, player_id: int) -> List[CatalogDinosaur]:
     """
     Get all dinosaurs unlocked by a specific player.
+    Reads only the ids from player_dinosaurs; the dinosaur fields come from the catalog.
     """
     try:
-        player = session.query(Player).filter(Player.id == player_id).first()
-        if not player:
-            return []
-        return player.dinosaurs
+        catalog = await get_dinosaur_catalog(session)
+        dinosaur_ids = session.scalars(
+            select(player_dinosaurs.c.dinosaur_id)
+            .where(player_dinosaurs.c.player_id == player_id)
+            .order_by(player_dinosaurs.c.dinosaur_id)
+        ).all()
+        return [catalog.by_id[dinosaur_id] for dinosaur_id in dinosaur_ids if dinosaur_id in catalog.by_id]
     except SQLAlchemyError as e:
         log.error(f"Error fetching player dinosaurs: {e}")
         raise
 
 
-async def unlock_dinosaur_for_player(session: Session, player_id: int, dinosaur_id: int) -> bool:
+async def unlock_and_select_dinosaur(session: Session, player_id: int, dinosaur_id: int) -> Optional[bool]:
     """
-    Unlock a dinosaur for a player (add to their collection).
-    Returns True if successful, False if already unlocked.
+    Unlock a dinosaur for a player (add to their collection) and make it the selected one,
+    in a single statement: INSERT ... ON CONFLICT DO NOTHING RETURNING plus the UPDATE of
+    players.selected_dinosaur_id, as data-modifying CTEs in one transaction.
+    Returns already_unlocked (True if the player had it before), or None if the player
+    or dinosaur does not exist.
     """
+    inserted = (
+        pg_insert(player_dinosaurs)
+        .values(player_id=player_id, dinosaur_id=dinosaur_id)
+        .on_conflict_do_nothing(index_elements=[player_dinosaurs.c.player_id, player_dinosaurs.c.dinosaur_id])
+        .returning(player_dinosaurs.c.dinosaur_id)
+        .cte("inserted")
+    )
+    selected = (
+        update(Player)
+        .where(Player.id == player_id, Player.selected_dinosaur_id.is_distinct_from(dinosaur_id))
+        .values(selected_dinosaur_id=dinosaur_id)
+        .returning(Player.id)
+        .cte("selected")
+    )
     try:
-        player = session.query(Player).filter(Player.id == player_id).first()
-        if not player:
-            log.error(f"Player {player_id} not found")
-            return False
-        
-        dinosaur = session.query(Dinosaur).filter(Dinosaur.id == dinosaur_id).first()
-        if not dinosaur:
-            log.error(f"Dinosaur {dinosaur_id} not found")
-            return False
-        
-        # Check if already unlocked
-        if dinosaur in player.dinosaurs:
-            log.info(f"Player {player_id} already has dinosaur {dinosaur_id}")
-            return False
-        
-        # Add dinosaur to player's collection
-        player.dinosaurs.append(dinosaur)
+        newly_unlocked, _ = session.execute(
+            select(exists(select(inserted.c.dinosaur_id)), exists(select(selected.c.id)))
+        ).one()
         session.commit()
-        log.info(f"Unlocked dinosaur {dinosaur_id} ({dinosaur.name}) for player {player_id}")
-        return True
+    except IntegrityError as e:
+        # Foreign key violation: unknown player or dinosaur
+        session.rollback()
+        log.error(f"Cannot unlock dinosaur {dinosaur_id} for player {player_id}: {e.orig}")
+        return None
     except SQLAlchemyError as e:
         session.rollback()
         log.error(f"Error unlocking dinosaur for player: {e}")
         raise
+    if newly_unlocked:
+        log.info(f"Unlocked dinosaur {dinosaur_id} for player {player_id}")
+    return not newly_unlocked
 
 
 async def select_dinosaur_for_player(session: Session, player_id: int, dinosaur_id: int) -> bool:
     """
     Select a dinosaur as the active one for a player.
     Returns True if successful, False if player doesn't have this dinosaur.
+    One conditional UPDATE - the ownership check runs inside the statement.
     """
+    owned = exists().where(
+        player_dinosaurs.c.player_id == player_id,
+        player_dinosaurs.c.dinosaur_id == dinosaur_id,
+    )
     try:
-        player = session.query(Player).filter(Player.id == player_id).first()
-        if not player:
-            log.error(f"Player {player_id} not found")
-            return False
-        
-        dinosaur = session.query(Dinosaur).filter(Dinosaur.id == dinosaur_id).first()
-        if not dinosaur:
-            log.error(f"Dinosaur {dinosaur_id} not found")
-            return False
-        
-        # Check if player has this dinosaur
-        if dinosaur not in player.dinosaurs:
-            log.warning(f"Player {player_id} doesn't have dinosaur {dinosaur_id}")
-            return False
-        
-        # Set as selected dinosaur
-        player.selected_dinosaur_id = dinosaur_id
+        updated_id = session.execute(
+            update(Player)
+            .where(Player.id == player_id, owned)
+            .values(selected_dinosaur_id=dinosaur_id)
+            .returning(Player.id)
+        ).scalar()
         session.commit()
-        log.info(f"Selected dinosaur {dinosaur_id} ({dinosaur.name}) for player {player_id}")
-        return True
     except SQLAlchemyError as e:
         session.rollback()
         log.error(f"Error selecting dinosaur for player: {e}")
         raise
+    if updated_id is None:
+        log.warning(f"Player {player_id} doesn't have dinosaur {dinosaur_id}")
+        return False
+    log.info(f"Selected dinosaur {dinosaur_id} for player {player_id}")
+    return True
 
 
-async def get_selected_dinosaur(session: Session, player_id: int) -> Optional[Dinosaur]:
+async def get_selected_dinosaur(session: Session, player_id: int) -> Optional[CatalogDinosaur]:
     """
     Get the currently selected dinosaur for a player.
     """
     try:
-        player = session.query(Player).filter(Player.id == player_id).first()
+        # Usually already in the session's identity map (the route just loaded the player)
+        player = session.get(Player, player_id)
         if not player or not player.selected_dinosaur_id:
             return None
-        return player.selected_dinosaur
+        catalog = await get_dinosaur_catalog(session)
+        return catalog.by_id.get(player.selected_dinosaur_id)
     except SQLAlchemyError as e:
         log.error(f"Error fetching selected dinosaur: {e}")
         raise
-
-
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from infra.database import SessionLocal
+from models import Player, PlayerSession, PlayerAnswer
+
+EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip from the server-side cursor
+
+
+def _players_query(start: Optional[datetime], end: Optional[datetime], player_id: Optional[int]) -> Select:
+    stmt = select(
+        Player.id, Player.name, Player.age, Player.created_at,
+        Player.excluded_from_leaderboard, Player.selected_dinosaur_id,
+    ).order_by(Player.id)
+    if start:
+        stmt = stmt.where(Player.created_at >= start)
+    if end:
+        stmt = stmt.where(Player.created_at <= end)
+    if player_id:
+        stmt = stmt.where(Player.id == player_id)
+    return stmt
+
+
+def _sessions_query(start: Optional[datetime], end: Optional[datetime], player_id: Optional[int]) -> Select:
+    stmt = select(
+        PlayerSession.id, PlayerSession.player_id, PlayerSession.game_id, PlayerSession.score,
+        PlayerSession.stage, PlayerSession.winning_score, PlayerSession.started_at, PlayerSession.ended_at,
+    ).order_by(PlayerSession.id)
+    if start:
+        stmt = stmt.where(PlayerSession.started_at >= start)
+    if end:
+        stmt = stmt.where(PlayerSession.started_at <= end)
+    if player_id:
+        stmt = stmt.where(PlayerSession.player_id == player_id)
+    return stmt
+
+
+def _answers_query(start: Optional[datetime], end: Optional[datetime], player_id: Optional[int]) -> Select:
+    stmt = (
+        select(
+            PlayerAnswer.id, PlayerAnswer.session_id, PlayerSession.player_id, PlayerAnswer.question_id,
+            PlayerAnswer.player_answer, PlayerAnswer.is_correct, PlayerAnswer.answered_at,
+        )
+        .join(PlayerSession, PlayerSession.id == PlayerAnswer.session_id)
+        .order_by(PlayerAnswer.id)
+    )
+    if start:
+        stmt = stmt.where(PlayerAnswer.answered_at >= start)
+    if end:
+        stmt = stmt.where(PlayerAnswer.answered_at <= end)
+    if player_id:
+        stmt = stmt.where(PlayerSession.player_id == player_id)
+    return stmt
+
+
+EXPORT_QUERIES = {
+    "players": _players_query,
+    "sessions": _sessions_query,
+    "answers": _answers_query,
+}
+
+
+def export_columns(entity: str) -> list[str]:
+    return [column.name for column in EXPORT_QUERIES[entity](None, None, None).selected_columns]
+
+
+def stream_export_rows(
+    entity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    player_id: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Yield export rows one by one from a server-side cursor, so memory stays flat
+    regardless of table size. Opens its own DB session because it outlives the
+    request handler (it is consumed by a StreamingResponse).
+    """
+    stmt = EXPORT_QUERIES[entity](start, end, player_id)
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        for row in result.mappings():
+            yield dict(row)
+    finally:
+        db.close()
@@ -4,6 +4,7 @@ from typing import Optional
 from sqlalchemy.orm import Session
 
 from models import PlayerSession, PlayerAnswer
+from dal.admin_summary_dal import record_answer
 
 
 async def update_player_answer(session: Session, player_session_id: int,
@@ -17,6 +18,7 @@ async def update_player_answer(session: Session, player_session_id: int,
     )
     session.add(player_answer)
     session.commit()
+    await record_answer(is_correct)
 
 
 @dataclass
@@ -0,0 +1,143 @@
+from sqlalchemy import func, select, update, cast, literal, Date, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select, Subquery
+
+from infra.logger import log
+from models import PlayerSession, PlayerAnswer, PlayerDailyStats
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _answer_counts(*session_criteria) -> Subquery:
+    """Correct / incorrect answer counts per session, for sessions matching the criteria."""
+    return (
+        select(
+            PlayerAnswer.session_id.label("session_id"),
+            func.count().filter(PlayerAnswer.is_correct.is_(True)).label("correct"),
+            func.count().filter(PlayerAnswer.is_correct.isnot(True)).label("incorrect"),
+        )
+        .join(PlayerSession, PlayerSession.id == PlayerAnswer.session_id)
+        .where(*session_criteria)
+        .group_by(PlayerAnswer.session_id)
+        .subquery()
+    )
+
+
+def live_session_rows(*session_criteria) -> Select:
+    """
+    One row per completed session matching the criteria, shaped like a
+    player_daily_stats row so it can be unioned with the rollup.
+    """
+    counts = _answer_counts(PlayerSession.ended_at.isnot(None), *session_criteria)
+    return (
+        select(
+            PlayerSession.player_id.label("player_id"),
+            cast(PlayerSession.ended_at, Date).label("day"),
+            literal(1).label("games"),
+            func.coalesce(PlayerSession.score, 0).label("score_sum"),
+            func.coalesce(counts.c.correct, 0).label("correct"),
+            func.coalesce(counts.c.incorrect, 0).label("incorrect"),
+            PlayerSession.ended_at.label("first_ended_at"),
+            PlayerSession.ended_at.label("last_ended_at"),
+            literal(False).label("from_rollup"),
+            PlayerSession.rolled_up.label("rolled_up"),
+        )
+        .outerjoin(counts, counts.c.session_id == PlayerSession.id)
+        .where(PlayerSession.ended_at.isnot(None), *session_criteria)
+    )
+
+
+def rollup_rows(*criteria) -> Select:
+    return select(
+        PlayerDailyStats.player_id,
+        PlayerDailyStats.day,
+        PlayerDailyStats.games,
+        PlayerDailyStats.score_sum,
+        PlayerDailyStats.correct,
+        PlayerDailyStats.incorrect,
+        PlayerDailyStats.first_ended_at,
+        PlayerDailyStats.last_ended_at,
+        literal(True).label("from_rollup"),
+        literal(True).label("rolled_up"),
+    ).where(*criteria)
+
+
+def daily_rows(rollup_criteria: tuple, live_criteria: tuple) -> Subquery:
+    """
+    Day-level rows from the rollup plus the completed sessions it does not cover.
+    Callers pick the split: sessions matched by live_criteria must not also be
+    counted by a rollup row matched by rollup_criteria. Rows carry from_rollup
+    and rolled_up so aggregates over the union can re-apply the split per range.
+    """
+    return union_all(
+        rollup_rows(*rollup_criteria),
+        live_session_rows(*live_criteria),
+    ).subquery()
+
+
+def rollup_sessions(session: Session, *session_criteria) -> None:
+    """
+    Add completed, not yet rolled up sessions matching the criteria into
+    player_daily_stats and mark them rolled up. Does not commit.
+    """
+    pending = (PlayerSession.rolled_up.is_(False), *session_criteria)
+    rows = live_session_rows(*pending).subquery()
+    grouped = (
+        select(
+            rows.c.player_id,
+            rows.c.day,
+            func.sum(rows.c.games),
+            func.sum(rows.c.score_sum),
+            func.sum(rows.c.correct),
+            func.sum(rows.c.incorrect),
+            func.min(rows.c.first_ended_at),
+            func.max(rows.c.last_ended_at),
+        )
+        .group_by(rows.c.player_id, rows.c.day)
+    )
+    stmt = pg_insert(PlayerDailyStats).from_select(
+        ["player_id", "day", "games", "score_sum", "correct", "incorrect", "first_ended_at", "last_ended_at"],
+        grouped,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlayerDailyStats.player_id, PlayerDailyStats.day],
+        set_={
+            "games": PlayerDailyStats.games + stmt.excluded.games,
+            "score_sum": PlayerDailyStats.score_sum + stmt.excluded.score_sum,
+            "correct": PlayerDailyStats.correct + stmt.excluded.correct,
+            "incorrect": PlayerDailyStats.incorrect + stmt.excluded.incorrect,
+            "first_ended_at": func.least(PlayerDailyStats.first_ended_at, stmt.excluded.first_ended_at),
+            "last_ended_at": func.greatest(PlayerDailyStats.last_ended_at, stmt.excluded.last_ended_at),
+        },
+    )
+    session.execute(stmt)
+    session.execute(
+        update(PlayerSession)
+        .where(PlayerSession.ended_at.isnot(None), *pending)
+        .values(rolled_up=True)
+    )
+
+
+async def backfill_daily_stats(session: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Roll up every completed session that is not in player_daily_stats yet.
+    Works in committed batches so it can run next to live traffic.
+    Returns the number of sessions rolled up.
+    """
+    total = 0
+    while True:
+        session_ids = session.scalars(
+            select(PlayerSession.id)
+            .where(PlayerSession.ended_at.isnot(None), PlayerSession.rolled_up.is_(False))
+            .order_by(PlayerSession.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not session_ids:
+            break
+        rollup_sessions(session, PlayerSession.id.in_(session_ids))
+        session.commit()
+        total += len(session_ids)
+        log.info(f"Daily stats backfill: {total} sessions rolled up")
+    return total
@@ -1,10 +1,20 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import delete, func, select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
-from infra.redis_client import redis_client
+from infra.redis_client import redis_client, async_redis_client
+from infra.http_cache import leaderboard_version
+from dal.admin_summary_dal import (
+    record_player_created, invalidate_summary_counters, invalidate_summary_counters_async,
+)
+from dal.player_session_dal import LEADERBOARD_CACHE_KEYS, invalidate_leaderboard
 import redis
 from infra.logger import log
-from models import Player, PlayerSession, PlayerAnswer
+from infra.metrics import record_cache_lookup
+from models import Player, PlayerSession, PlayerAnswer, PlayerDailyStats, player_dinosaurs
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 
 
 async def create_player(session: Session, name: str, age: int,  hashed_password: str) -> Optional[Player]:
@@ -12,6 +22,7 @@ async def create_player(session: Session, name: str, age: int,  hashed_password:
         player = Player(name=name, age=age, password=hashed_password)
         session.add(player)
         session.commit()
+        await record_player_created()
         return player
     except SQLAlchemyError as e:
         session.rollback()
@@ -32,7 +43,8 @@ async def get_player_by_name(
 
     # Try to get from cache
     try:
-        cached = redis_client.get(cache_key)
+        cached = await async_redis_client.get(cache_key)
+        record_cache_lookup("player_by_name", bool(cached))
         if cached:
             player_id = int(cached)
             return session.get(Player, player_id)
@@ -51,7 +63,7 @@ async def get_player_by_name(
 
     # Try to cache the result
     try:
-        redis_client.setex(
+        await async_redis_client.setex(
             cache_key,
             120,
             str(player.id),
@@ -62,9 +74,151 @@ async def get_player_by_name(
     return player
 
 
+# Above this many rows an exact COUNT(*) is skipped in favour of the planner estimate
+EXACT_COUNT_THRESHOLD = 10000
+
+
+@dataclass
+class PlayersPage:
+    players: List[Player]
+    total: Optional[int]  # None when not requested
+    total_is_estimate: bool
+    next_cursor: Optional[str]
+
+
+def encode_players_cursor(player: Player) -> str:
+    raw = f"{player.created_at.isoformat()}|{player.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_players_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, player_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(player_id)
+    except (UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _escape_like(term: str) -> str:
+    """Escape LIKE wildcards with '/' (a backslash literal depends on standard_conforming_strings)."""
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def _estimate_count(session: Session, stmt) -> int:
+    """Row estimate from the planner (EXPLAIN) - no table scan."""
+    compiled = stmt.compile(dialect=session.bind.dialect)
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_players(session: Session, criteria: list) -> tuple[int, bool]:
+    """
+    (total, is_estimate). One capped COUNT answers small results exactly; only when
+    the cap is hit does a second round trip ask the planner for an estimate.
+    """
+    capped = select(Player.id).where(*criteria).limit(EXACT_COUNT_THRESHOLD + 1).subquery()
+    total = session.scalar(select(func.count()).select_from(capped))
+    if total > EXACT_COUNT_THRESHOLD:
+        return _estimate_count(session, select(Player.id).where(*criteria)), True
+    return total, False
+
+
+async def list_players(
+    session: Session,
+    page_size: int,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    search: Optional[str] = None,
+    include_total: Optional[bool] = None,
+) -> PlayersPage:
+    """
+    List players newest first. With a cursor, uses keyset pagination on
+    (created_at, id); otherwise falls back to OFFSET paging by page number.
+    Name search is a substring ILIKE served by the pg_trgm GIN index.
+    The total is exact for small results and a planner estimate for large ones.
+    It is computed for page-number requests and skipped when following a cursor,
+    unless include_total says otherwise.
+    """
+    criteria = []
+    if search:
+        criteria.append(Player.name.ilike(f"%{_escape_like(search)}%", escape="/"))
+
+    stmt = select(Player).where(*criteria).order_by(Player.created_at.desc(), Player.id.desc())
+    if cursor:
+        created_at, player_id = decode_players_cursor(cursor)
+        stmt = stmt.where(tuple_(Player.created_at, Player.id) < (created_at, player_id))
+    else:
+        stmt = stmt.offset((page - 1) * page_size)
+    rows = session.scalars(stmt.limit(page_size + 1)).all()
+
+    players = list(rows[:page_size])
+    next_cursor = encode_players_cursor(players[-1]) if len(rows) > page_size and players[-1].created_at else None
+
+    total, total_is_estimate = None, False
+    if include_total if include_total is not None else cursor is None:
+        total, total_is_estimate = _count_players(session, criteria)
+
+    return PlayersPage(players=players, total=total, total_is_estimate=total_is_estimate, next_cursor=next_cursor)
+
+
+def delete_players_set_based(session: Session, player_ids: List[int]) -> List[tuple[int, str]]:
+    """
+    Delete players and all related data (answers, sessions, daily stats, dinosaurs)
+    with one set-based DELETE per table. Does not commit.
+    Returns (id, name) of the players that were deleted.
+    """
+    no_sync = {"synchronize_session": False}
+    session.execute(
+        delete(PlayerAnswer)
+        .where(PlayerAnswer.session_id == PlayerSession.id)  # DELETE ... USING player_sessions
+        .where(PlayerSession.player_id.in_(player_ids)),
+        execution_options=no_sync,
+    )
+    session.execute(delete(PlayerSession).where(PlayerSession.player_id.in_(player_ids)), execution_options=no_sync)
+    session.execute(delete(PlayerDailyStats).where(PlayerDailyStats.player_id.in_(player_ids)), execution_options=no_sync)
+    session.execute(delete(player_dinosaurs).where(player_dinosaurs.c.player_id.in_(player_ids)))
+    deleted = session.execute(
+        delete(Player).where(Player.id.in_(player_ids)).returning(Player.id, Player.name),
+        execution_options=no_sync,
+    ).all()
+    return [(row.id, row.name) for row in deleted]
+
+
+def _deleted_players_cache_keys(deleted: List[tuple[int, str]]) -> List[str]:
+    keys = [f"player:name:{name}" for _, name in deleted]
+    keys += [f"player:{player_id}:last_sessions:10" for player_id, _ in deleted]
+    return keys + LEADERBOARD_CACHE_KEYS
+
+
+def clear_deleted_players_cache(deleted: List[tuple[int, str]]) -> None:
+    """Drop cached lookups of deleted players and the leaderboard (sync, for the purge worker thread)."""
+    if not deleted:
+        return
+    invalidate_summary_counters()
+    try:
+        redis_client.delete(*_deleted_players_cache_keys(deleted))
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        pass  # Redis unavailable, skip cache clearing
+    leaderboard_version.bump()  # after the Redis delete, see invalidate_leaderboard
+
+
+async def clear_deleted_players_cache_async(deleted: List[tuple[int, str]]) -> None:
+    """clear_deleted_players_cache for request handlers: awaits Redis instead of blocking the event loop."""
+    if not deleted:
+        return
+    await invalidate_summary_counters_async()
+    try:
+        await async_redis_client.delete(*_deleted_players_cache_keys(deleted))
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        pass  # Redis unavailable, skip cache clearing
+    leaderboard_version.bump()  # after the Redis delete, see invalidate_leaderboard
+
+
 async def delete_player(session: Session, player_id: int) -> Optional[Player]:
     """
-    Delete player and all related data (sessions, answers).
+    Delete player and all related data (sessions, answers, daily stats, dinosaurs).
     Returns the deleted player if found, None otherwise.
     """
     try:
@@ -72,35 +226,11 @@ async def delete_player(session: Session, player_id: int) -> Optional[Player]:
         if not player:
             return None
 
-        # Delete all player answers (through sessions)
-        player_sessions = session.query(PlayerSession).filter(
-            PlayerSession.player_id == player_id
-        ).all()
-        
-        for ps in player_sessions:
-            # Delete all answers for this session
-            session.query(PlayerAnswer).filter(
-                PlayerAnswer.session_id == ps.id
-            ).delete()
-
-        # Delete all player sessions
-        session.query(PlayerSession).filter(
-            PlayerSession.player_id == player_id
-        ).delete()
-
-        # Delete the player
-        session.delete(player)
+        deleted = delete_players_set_based(session, [player_id])
+        # Keep the loaded attributes readable after the row is gone
+        session.expunge(player)
         session.commit()
-
-        # Clear Redis cache for this player
-        try:
-            redis_client.delete(f"player:name:{player.name}")
-            redis_client.delete(f"player:{player_id}:last_sessions:*")
-            # Clear leaderboard cache
-            for limit in [10, 20, 50, 100]:
-                redis_client.delete(f"leaderboard:top:{limit}")
-        except (redis.ConnectionError, redis.TimeoutError, AttributeError):
-            pass  # Redis unavailable, skip cache clearing
+        await clear_deleted_players_cache_async(deleted)
 
         log.info(f"Deleted player {player_id} ({player.name}) and all related data")
         return player
@@ -122,13 +252,9 @@ async def exclude_player_from_leaderboard(session: Session, player_id: int) -> O
         
         player.excluded_from_leaderboard = True
         session.commit()
-        
+
         # Clear leaderboard cache since player was excluded
-        try:
-            for limit in [10, 20, 50, 100]:
-                redis_client.delete(f"leaderboard:top:{limit}")
-        except (redis.ConnectionError, redis.TimeoutError, AttributeError):
-            pass  # Redis unavailable, skip cache clearing
+        await invalidate_leaderboard()
         
         log.info(f"Excluded player {player_id} ({player.name}) from leaderboard")
         return player
@@ -150,13 +276,9 @@ async def include_player_in_leaderboard(session: Session, player_id: int) -> Opt
         
         player.excluded_from_leaderboard = False
         session.commit()
-        
+
         # Clear leaderboard cache since player was included back
-        try:
-            for limit in [10, 20, 50, 100]:
-                redis_client.delete(f"leaderboard:top:{limit}")
-        except (redis.ConnectionError, redis.TimeoutError, AttributeError):
-            pass  # Redis unavailable, skip cache clearing
+        await invalidate_leaderboard()
         
         log.info(f"Included player {player_id} ({player.name}) back in leaderboard")
         return player
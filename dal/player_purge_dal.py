@@ -0,0 +1,114 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from dal.player_dal import delete_players_set_based, clear_deleted_players_cache
+from infra.database import SessionLocal
+from infra.logger import log
+
+PURGE_CHUNK_SIZE = 50          # players per transaction
+PURGE_PAUSE_SEC = 0.05         # breathing room for gameplay transactions between chunks
+PURGE_LOCK_TIMEOUT = "2s"      # a chunk gives up instead of queueing behind gameplay locks
+MAX_PURGE_PLAYERS = 10000      # per job
+MAX_PURGE_JOBS = 50            # jobs kept for progress lookups; only finished ones are evicted
+
+
+@dataclass
+class PurgeJob:
+    id: str
+    player_ids: List[int]
+    status: str = "pending"  # pending | running | done | failed
+    deleted: int = 0
+    not_found: int = 0
+    failed_player_ids: List[int] = field(default_factory=list)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @property
+    def processed(self) -> int:
+        return self.deleted + self.not_found + len(self.failed_player_ids)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.player_ids),
+            "processed": self.processed,
+            "deleted": self.deleted,
+            "not_found": self.not_found,
+            "failed_player_ids": self.failed_player_ids,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+
+_jobs: "OrderedDict[str, PurgeJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def create_purge_job(player_ids: List[int]) -> Optional[PurgeJob]:
+    """Register a new job, evicting the oldest finished one when full. None if every kept job is still active."""
+    job = PurgeJob(id=uuid.uuid4().hex, player_ids=list(dict.fromkeys(player_ids)))
+    with _jobs_lock:
+        if len(_jobs) >= MAX_PURGE_JOBS:
+            finished_id = next((job_id for job_id, kept in _jobs.items() if kept.finished_at is not None), None)
+            if finished_id is None:
+                return None
+            del _jobs[finished_id]
+        _jobs[job.id] = job
+    return job
+
+
+def get_purge_job(job_id: str) -> Optional[PurgeJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def run_purge_job(job_id: str) -> None:
+    """
+    Delete the job's players in short chunked transactions. Meant to run as a
+    background task (a worker thread), so it opens its own DB session.
+    """
+    job = get_purge_job(job_id)
+    if not job:
+        return
+    job.status = "running"
+    log.info(f"Purge job {job.id}: deleting {len(job.player_ids)} players")
+
+    db = SessionLocal()
+    try:
+        for start in range(0, len(job.player_ids), PURGE_CHUNK_SIZE):
+            chunk = job.player_ids[start:start + PURGE_CHUNK_SIZE]
+            try:
+                db.execute(text(f"SET LOCAL lock_timeout = '{PURGE_LOCK_TIMEOUT}'"))
+                deleted = delete_players_set_based(db, chunk)
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                job.failed_player_ids.extend(chunk)
+                log.warning(f"Purge job {job.id}: chunk starting at {start} failed: {e}")
+                continue
+
+            clear_deleted_players_cache(deleted)
+            job.deleted += len(deleted)
+            job.not_found += len(chunk) - len(deleted)
+            time.sleep(PURGE_PAUSE_SEC)
+
+        job.status = "done"
+        log.info(f"Purge job {job.id}: done ({job.deleted} deleted, {len(job.failed_player_ids)} failed)")
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        log.error(f"Purge job {job.id} failed: {e}")
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+        db.close()
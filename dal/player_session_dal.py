@@ -2,11 +2,15 @@ from dataclasses import asdict, dataclass
 import json
 from sqlalchemy import desc, func
 from infra.logger import log
-from models import PlayerSession, Question, Player
-from sqlalchemy.orm import Session, joinedload
+from infra.metrics import record_cache_lookup
+from models import PlayerSession, PlayerAnswer, Question, Player
+from sqlalchemy.orm import Session, selectinload, load_only
 from typing import Optional, List
 from datetime import datetime
-from infra.redis_client import redis_client
+from infra.redis_client import async_redis_client
+from infra.http_cache import leaderboard_version
+from dal.player_daily_stats_dal import rollup_sessions
+from dal.admin_summary_dal import record_session_started
 import redis
 
 # Default win target for a brand-new player who has no prior session to inherit from.
@@ -90,6 +94,7 @@ async def create_player_session_with_stage(session: Session, player_id: int, gam
     session.add(new_session)
     session.commit()
     session.refresh(new_session)
+    await record_session_started(player_id)
     log.info(f"Created session for player {player_id} at stage {stage}")
     return new_session
 
@@ -126,6 +131,7 @@ async def create_player_session(session: Session, player_id: int, game_id: int)
     session.add(new_session)
     session.commit()
     session.refresh(new_session)
+    await record_session_started(player_id)
     return new_session
 
 
@@ -149,17 +155,14 @@ async def end_session(session: Session, session_id: int) -> Optional[PlayerSessi
     if not player_session:
         return None
     player_session.ended_at = datetime.now()
+    session.flush()
+    # Count the finished session in player_daily_stats in the same transaction
+    rollup_sessions(session, PlayerSession.id == session_id)
     session.commit()
-    
+
     # Clear leaderboard cache when a game ends
-    try:
-        # Delete all leaderboard cache keys (for different limits)
-        for limit in [10, 20, 50, 100]:
-            cache_key = f"leaderboard:top:{limit}"
-            redis_client.delete(cache_key)
-    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
-        pass  # Redis unavailable, skip cache clearing
-    
+    await invalidate_leaderboard()
+
     return player_session
 
 
@@ -186,14 +189,30 @@ async def update_score_and_stage_player_session(session: Session, question: Ques
 async def update_player_stage(session: Session, player_session: PlayerSession, new_stage: int=1):
     player_session.stage = new_stage
     session.commit()
-    log.info(f"player session update stage : {new_stage}")
+    log.debug(f"player session update stage : {new_stage}")
 
 
 async def update_session_winning_score(session: Session, player_session: PlayerSession, new_winning_score: int):
     """Set the win target on this player's own session only (never global)."""
     player_session.winning_score = new_winning_score
     session.commit()
-    log.info(f"player session {player_session.id} winning_score set to {new_winning_score}")
+    log.debug(f"player session {player_session.id} winning_score set to {new_winning_score}")
+
+
+# Redis leaderboard caches, one per limit served
+LEADERBOARD_CACHE_KEYS = [f"leaderboard:top:{limit}" for limit in [10, 20, 50, 100]]
+
+
+async def invalidate_leaderboard() -> None:
+    """
+    Drop the Redis leaderboards, then move the version (and the ETag). In this order
+    a reader that already sees the new version can no longer find the old rows in Redis.
+    """
+    try:
+        await async_redis_client.delete(*LEADERBOARD_CACHE_KEYS)
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        pass  # Redis unavailable, skip cache clearing
+    leaderboard_version.bump()
 
 
 @dataclass
@@ -202,12 +221,25 @@ class PlayerScore:
     score: int
 
 
+# In-process leaderboard snapshots per limit: (leaderboard_version, rows).
+# Valid until the version moves, so repeat reads skip both Redis and the DB.
+# Only rows read from the DB are snapshotted - a Redis copy may predate the last bump.
+_top_players_snapshot: dict[int, tuple[int, List[PlayerScore]]] = {}
+
+
 async def get_top_players(session: Session, limit: int = 10) -> List[PlayerScore]:
+    version = leaderboard_version.value
+    snapshot = _top_players_snapshot.get(limit)
+    if snapshot and snapshot[0] == version:
+        record_cache_lookup("leaderboard", True)
+        return snapshot[1]
+
     cache_key = f"leaderboard:top:{limit}"
     
     # Try to get from cache
     try:
-        cached = redis_client.get(cache_key)
+        cached = await async_redis_client.get(cache_key)
+        record_cache_lookup("leaderboard", bool(cached))
         if cached:
             data = json.loads(cached)
             return [PlayerScore(**row) for row in data]
@@ -237,16 +269,19 @@ async def get_top_players(session: Session, limit: int = 10) -> List[PlayerScore
     )
     result = [PlayerScore(name=row[0], score=row[1]) for row in top_players]
 
+    _top_players_snapshot[limit] = (version, result)
+    if leaderboard_version.value != version:
+        return result  # invalidated while we were reading, the rows may be stale
+
     # Try to cache the result
     try:
-        redis_client.setex(
+        await async_redis_client.setex(
             cache_key,
             300,  # 5 דקות
             json.dumps([asdict(r) for r in result]),
         )
     except (redis.ConnectionError, redis.TimeoutError, AttributeError):
         pass  # Redis unavailable, skip caching
-
     return result
 
 
@@ -294,6 +329,16 @@ async def get_player_rank(session: Session, player_id: int) -> Optional[int]:
     
     return rank + 1
 
+# Eager-load exactly what get_wrong_questions reads: one SELECT for all answers
+# and one for their questions, instead of a joined cartesian plus a lazy load per answer.
+SESSION_ANSWERS_OPTIONS = (
+    selectinload(PlayerSession.answers).options(
+        load_only(PlayerAnswer.is_correct, PlayerAnswer.player_answer, PlayerAnswer.question_id),
+        selectinload(PlayerAnswer.question).load_only(Question.text, Question.correct_answer),
+    ),
+)
+
+
 async def get_last_player_sessions(
     session: Session,
     player_id: int,
@@ -303,12 +348,13 @@ async def get_last_player_sessions(
 
     # Try to get from cache
     try:
-        cached = redis_client.get(cache_key)
+        cached = await async_redis_client.get(cache_key)
+        record_cache_lookup("last_sessions", bool(cached))
         if cached:
             ids: list[int] = json.loads(cached)
             return (
                 session.query(PlayerSession)
-                .options(joinedload(PlayerSession.answers))
+                .options(*SESSION_ANSWERS_OPTIONS)
                 .filter(PlayerSession.id.in_(ids))
                 .filter(PlayerSession.ended_at.isnot(None))  # Only completed sessions
                 .order_by(desc(PlayerSession.ended_at))
@@ -319,7 +365,7 @@ async def get_last_player_sessions(
 
     player_sessions = (
         session.query(PlayerSession)
-        .options(joinedload(PlayerSession.answers))
+        .options(*SESSION_ANSWERS_OPTIONS)
         .filter(PlayerSession.player_id == player_id)
         .filter(PlayerSession.ended_at.isnot(None))  # Only completed sessions
         .order_by(desc(PlayerSession.ended_at))
@@ -327,9 +373,13 @@ async def get_last_player_sessions(
         .all()
     )
 
+    _top_players_snapshot[limit] = (version, result)
+    if leaderboard_version.value != version:
+        return result  # invalidated while we were reading, the rows may be stale
+
     # Try to cache the result
     try:
-        redis_client.setex(
+        await async_redis_client.setex(
             cache_key,
             120,
             json.dumps([ps.id for ps in player_sessions]),
@@ -337,4 +387,43 @@ async def get_last_player_sessions(
     except (redis.ConnectionError, redis.TimeoutError, AttributeError):
         pass  # Redis unavailable, skip caching
 
-    return player_sessions
\ No newline at end of file
+    return player_sessions
+
+
+async def get_last_sessions_for_players(
+    session: Session,
+    player_ids: List[int],
+    limit_num: int = 10,
+) -> dict[int, list[PlayerSession]]:
+    """
+    Last completed sessions (newest first) for many players at once.
+    Uses a fixed number of queries regardless of how many players are requested.
+    """
+    if not player_ids:
+        return {}
+
+    ranked = (
+        session.query(
+            PlayerSession.id.label("session_id"),
+            func.row_number().over(
+                partition_by=PlayerSession.player_id,
+                order_by=desc(PlayerSession.ended_at),
+            ).label("rn"),
+        )
+        .filter(PlayerSession.player_id.in_(player_ids))
+        .filter(PlayerSession.ended_at.isnot(None))  # Only completed sessions
+        .subquery()
+    )
+    player_sessions = (
+        session.query(PlayerSession)
+        .options(*SESSION_ANSWERS_OPTIONS)
+        .join(ranked, ranked.c.session_id == PlayerSession.id)
+        .filter(ranked.c.rn <= limit_num)
+        .order_by(PlayerSession.player_id, desc(PlayerSession.ended_at))
+        .all()
+    )
+
+    sessions_by_player: dict[int, list[PlayerSession]] = {player_id: [] for player_id in player_ids}
+    for ps in player_sessions:
+        sessions_by_player[ps.player_id].append(ps)
+    return sessions_by_player
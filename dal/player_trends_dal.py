@@ -1,10 +1,11 @@
 from dataclasses import dataclass
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta, time
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
-from models import PlayerSession, PlayerAnswer
+from sqlalchemy import func, and_, or_, extract, literal_column, cast, Date
+from models import PlayerSession, PlayerAnswer, PlayerDailyStats
 from dal.player_answer_dal import get_wrong_questions
+from dal.player_daily_stats_dal import daily_rows
 
 
 @dataclass
@@ -27,91 +28,57 @@ async def get_player_trends_by_period(
     """
     Get player statistics grouped by period (week or month).
     Returns trends showing how player performance changes over time.
+    Reads day-level rows from player_daily_stats plus any completed sessions
+    that are not rolled up yet, grouped with a single date_trunc(...) query.
     """
-    # Get all completed sessions for the player
-    player_sessions = (
-        session.query(PlayerSession)
-        .filter(
-            and_(
-                PlayerSession.player_id == player_id,
-                PlayerSession.ended_at.isnot(None)
-            )
+    # date_trunc('week') starts weeks on Monday, same as ISO weeks.
+    # Inlined as a literal so SELECT and GROUP BY render the identical expression.
+    trunc_unit = literal_column("'week'" if period_type == "week" else "'month'")
+
+    rows_source = daily_rows(
+        rollup_criteria=(PlayerDailyStats.player_id == player_id,),
+        live_criteria=(PlayerSession.player_id == player_id, PlayerSession.rolled_up.is_(False)),
+    )
+
+    period_start = func.date_trunc(trunc_unit, rows_source.c.day).label("period_start")
+    rows = (
+        session.query(
+            period_start,
+            func.sum(rows_source.c.games).label("total_games"),
+            func.sum(rows_source.c.score_sum).label("total_score"),
+            func.min(rows_source.c.first_ended_at).label("start_date"),
+            func.max(rows_source.c.last_ended_at).label("end_date"),
+            func.sum(rows_source.c.correct).label("total_correct"),
+            func.sum(rows_source.c.incorrect).label("total_incorrect"),
         )
-        .order_by(PlayerSession.ended_at.asc())
+        .group_by(period_start)
+        .order_by(period_start.asc())
         .all()
     )
 
-    if not player_sessions:
-        return []
-
-    # Group sessions by period
-    period_groups: dict[str, list[PlayerSession]] = {}
-
-    for ps in player_sessions:
-        if not ps.ended_at:
-            continue
-
-        if period_type == "week":
-            # ISO week format: YYYY-WNN (for grouping)
-            year, week, _ = ps.ended_at.isocalendar()
-            period_key = f"{year}-W{week:02d}"
-        else:  # month
-            year = ps.ended_at.year
-            month = ps.ended_at.month
-            period_key = f"{year}-{month:02d}"
-
-        if period_key not in period_groups:
-            period_groups[period_key] = []
-        period_groups[period_key].append(ps)
-
-    # Calculate stats for each period
     result: List[PeriodStats] = []
 
-    for period_key, sessions in sorted(period_groups.items()):
-        total_correct = 0
-        total_incorrect = 0
-        total_score = 0
-
-        # Calculate period date range
-        session_dates = [ps.ended_at for ps in sessions if ps.ended_at]
-        if not session_dates:
-            continue
-
-        start_date = min(session_dates)
-        end_date = max(session_dates)
-
-        # Calculate stats from all answers in sessions
-        for ps in sessions:
-            total_score += ps.score or 0
-            
-            # Count correct/incorrect answers
-            answers = session.query(PlayerAnswer).filter(
-                PlayerAnswer.session_id == ps.id
-            ).all()
-            
-            for answer in answers:
-                if answer.is_correct:
-                    total_correct += 1
-                else:
-                    total_incorrect += 1
-
+    for row in rows:
+        total_games = int(row.total_games)
+        total_correct = int(row.total_correct)
+        total_incorrect = int(row.total_incorrect)
         total_answers = total_correct + total_incorrect
         success_rate = (total_correct / total_answers * 100) if total_answers > 0 else 0.0
-        avg_score = total_score / len(sessions) if sessions else 0.0
+        avg_score = int(row.total_score) / total_games if total_games > 0 else 0.0
 
         # Format period_label as readable date
         if period_type == "week":
             # Format: DD/MM/YYYY (start date of week)
-            period_label = start_date.strftime("%d/%m/%Y")
+            period_label = row.start_date.strftime("%d/%m/%Y")
         else:  # month
             # Format: MM/YYYY (month/year)
-            period_label = start_date.strftime("%m/%Y")
+            period_label = row.start_date.strftime("%m/%Y")
 
         result.append(PeriodStats(
             period_label=period_label,
-            start_date=start_date,
-            end_date=end_date,
-            total_games=len(sessions),
+            start_date=row.start_date,
+            end_date=row.end_date,
+            total_games=total_games,
             avg_score=round(avg_score, 2),
             success_rate=round(success_rate, 2),
             total_correct=total_correct,
@@ -121,87 +88,134 @@ async def get_player_trends_by_period(
     return result
 
 
+MAX_COMPARE_PERIODS = 12
+
+
+def _full_days(start_date: datetime, end_date: datetime) -> tuple[date, date]:
+    """First and last day lying entirely inside the inclusive [start_date, end_date] range."""
+    first_full_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+    last_full_day = (end_date + timedelta(microseconds=1)).date() - timedelta(days=1)
+    return first_full_day, last_full_day
+
+
+def _period_source_criteria(start_date: datetime, end_date: datetime) -> tuple:
+    """
+    Split an inclusive [start_date, end_date] range between the daily rollup and live sessions.
+    Days fully inside the range come from player_daily_stats; sessions on the partial
+    edge days, and sessions not rolled up yet, are read from player_sessions directly.
+    """
+    first_full_day, last_full_day = _full_days(start_date, end_date)
+    ended_day = cast(PlayerSession.ended_at, Date)
+    rollup_criterion = and_(
+        PlayerDailyStats.day >= first_full_day,
+        PlayerDailyStats.day <= last_full_day,
+    )
+    live_criterion = and_(
+        PlayerSession.ended_at >= start_date,
+        PlayerSession.ended_at <= end_date,
+        or_(
+            PlayerSession.rolled_up.is_(False),
+            ended_day < first_full_day,
+            ended_day > last_full_day,
+        ),
+    )
+    return rollup_criterion, live_criterion
+
+
+def _in_period(rows_source, start_date: datetime, end_date: datetime):
+    """The same split as _period_source_criteria, applied to rows of daily_rows()."""
+    first_full_day, last_full_day = _full_days(start_date, end_date)
+    return or_(
+        and_(
+            rows_source.c.from_rollup.is_(True),
+            rows_source.c.day >= first_full_day,
+            rows_source.c.day <= last_full_day,
+        ),
+        and_(
+            rows_source.c.from_rollup.is_(False),
+            rows_source.c.first_ended_at >= start_date,
+            rows_source.c.first_ended_at <= end_date,
+            or_(
+                rows_source.c.rolled_up.is_(False),
+                rows_source.c.day < first_full_day,
+                rows_source.c.day > last_full_day,
+            ),
+        ),
+    )
+
+
 async def compare_player_periods(
     session: Session,
     player_id: int,
-    period1_start: datetime,
-    period1_end: datetime,
-    period2_start: datetime,
-    period2_end: datetime
+    periods: List[Tuple[datetime, datetime]]
 ) -> dict:
     """
-    Compare player performance between two time periods.
-    Returns statistics for both periods and the difference.
+    Compare player performance across time periods (inclusive start/end pairs).
+    All periods are computed in one statement with per-period FILTER aggregates.
+    Returns statistics per period and the difference of each period from the previous one.
     """
-    
-    def get_period_stats(start_date: datetime, end_date: datetime) -> dict:
-        sessions = (
-            session.query(PlayerSession)
-            .filter(
-                and_(
-                    PlayerSession.player_id == player_id,
-                    PlayerSession.ended_at.isnot(None),
-                    PlayerSession.ended_at >= start_date,
-                    PlayerSession.ended_at <= end_date
-                )
+    if not periods:
+        return {"periods": [], "differences": []}
+
+    source_criteria = [_period_source_criteria(start, end) for start, end in periods]
+    rows_source = daily_rows(
+        rollup_criteria=(
+            PlayerDailyStats.player_id == player_id,
+            or_(*[rollup_criterion for rollup_criterion, _ in source_criteria]),
+        ),
+        live_criteria=(
+            PlayerSession.player_id == player_id,
+            or_(*[live_criterion for _, live_criterion in source_criteria]),
+        ),
+    )
+
+    columns = []
+    for index, (start, end) in enumerate(periods):
+        in_period = _in_period(rows_source, start, end)
+        for field in ("games", "score_sum", "correct", "incorrect"):
+            columns.append(
+                func.coalesce(func.sum(rows_source.c[field]).filter(in_period), 0).label(f"p{index}_{field}")
             )
-            .all()
-        )
+    row = session.query(*columns).one()
 
-        total_correct = 0
-        total_incorrect = 0
-        total_score = 0
-        total_games = len(sessions)
-
-        for ps in sessions:
-            total_score += ps.score or 0
-            
-            answers = session.query(PlayerAnswer).filter(
-                PlayerAnswer.session_id == ps.id
-            ).all()
-            
-            for answer in answers:
-                if answer.is_correct:
-                    total_correct += 1
-                else:
-                    total_incorrect += 1
+    period_stats = []
+    for index, (start, end) in enumerate(periods):
+        total_games = int(row._mapping[f"p{index}_games"])
+        total_score = int(row._mapping[f"p{index}_score_sum"])
+        total_correct = int(row._mapping[f"p{index}_correct"])
+        total_incorrect = int(row._mapping[f"p{index}_incorrect"])
 
         total_answers = total_correct + total_incorrect
         success_rate = (total_correct / total_answers * 100) if total_answers > 0 else 0.0
         avg_score = total_score / total_games if total_games > 0 else 0.0
 
-        return {
+        period_stats.append({
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
             "total_games": total_games,
             "avg_score": round(avg_score, 2),
             "success_rate": round(success_rate, 2),
             "total_correct": total_correct,
             "total_incorrect": total_incorrect,
             "total_answers": total_answers
+        })
+
+    # Calculate differences (each period against the previous one)
+    differences = [
+        {
+            "avg_score": round(current["avg_score"] - previous["avg_score"], 2),
+            "success_rate": round(current["success_rate"] - previous["success_rate"], 2),
+            "total_games": current["total_games"] - previous["total_games"]
         }
-
-    period1_stats = get_period_stats(period1_start, period1_end)
-    period2_stats = get_period_stats(period2_start, period2_end)
-
-    # Calculate differences
-    diff_avg_score = period2_stats["avg_score"] - period1_stats["avg_score"]
-    diff_success_rate = period2_stats["success_rate"] - period1_stats["success_rate"]
-    diff_total_games = period2_stats["total_games"] - period1_stats["total_games"]
-
-    return {
-        "period1": {
-            "start_date": period1_start.isoformat(),
-            "end_date": period1_end.isoformat(),
-            **period1_stats
-        },
-        "period2": {
-            "start_date": period2_start.isoformat(),
-            "end_date": period2_end.isoformat(),
-            **period2_stats
-        },
-        "difference": {
-            "avg_score": round(diff_avg_score, 2),
-            "success_rate": round(diff_success_rate, 2),
-            "total_games": diff_total_games
-        }
-    }
-
+        for previous, current in zip(period_stats, period_stats[1:])
+    ]
+
+    result = {"periods": period_stats, "differences": differences}
+    if len(period_stats) >= 2:
+        # Two-period shape kept for existing clients
+        result.update({
+            "period1": period_stats[0],
+            "period2": period_stats[1],
+            "difference": differences[0]
+        })
+    return result
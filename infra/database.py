@@ -1,4 +1,13 @@
-from sqlalchemy import create_engine, text
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.exc import OperationalError
 from fastapi import HTTPException
 
@@ -113,6 +122,7 @@ def create_tables() -> None:
         log.info("Database tables created successfully")
         # Add any missing columns (for schema evolution)
         add_missing_columns()
+        ensure_indexes()
     except Exception as e:
         error_msg = f"Failed to create database tables: {e}"
         log.error(error_msg)
@@ -170,6 +180,20 @@ def add_missing_columns() -> None:
                 else:
                     log.warning(f"Error checking/adding 'winning_score' column: {e}")
 
+            # Check and add 'rolled_up' to 'player_sessions' table (daily stats rollup marker)
+            try:
+                session.execute(text("SELECT rolled_up FROM player_sessions LIMIT 1"))
+                log.info("Column 'rolled_up' already exists in 'player_sessions' table")
+            except Exception as e:
+                session.rollback()
+                if "does not exist" in str(e).lower() or "no such column" in str(e).lower() or "undefined column" in str(e).lower():
+                    log.info("Column 'rolled_up' does not exist in 'player_sessions' table. Adding it...")
+                    session.execute(text("ALTER TABLE player_sessions ADD COLUMN rolled_up BOOLEAN NOT NULL DEFAULT FALSE"))
+                    session.commit()
+                    log.info("Column 'rolled_up' added successfully to 'player_sessions' table")
+                else:
+                    log.warning(f"Error checking/adding 'rolled_up' column: {e}")
+
             # Check if 'dinosaurs' table exists
             try:
                 session.execute(text("SELECT 1 FROM dinosaurs LIMIT 1"))
@@ -190,6 +214,37 @@ def add_missing_columns() -> None:
         log.warning(f"Error during schema migration check: {e}")
 
 
+# Indexes created outside Base.metadata: create_all() skips indexes on tables that
+# already exist, and the trigram index needs the pg_trgm extension first.
+INDEXES = {
+    "ix_players_created_at_id": "CREATE INDEX IF NOT EXISTS ix_players_created_at_id ON players (created_at DESC, id DESC)",
+    "ix_players_name_trgm": "CREATE INDEX IF NOT EXISTS ix_players_name_trgm ON players USING gin (name gin_trgm_ops)",
+}
+
+
+def ensure_indexes() -> None:
+    """
+    Create performance indexes if they don't exist. Failures are logged, not raised -
+    the app still works without them, only slower (e.g. pg_trgm not allowed on the host).
+    """
+    with SessionLocal() as session:
+        try:
+            session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            log.warning(f"Could not enable pg_trgm extension: {e}")
+
+        for name, ddl in INDEXES.items():
+            try:
+                session.execute(text(ddl))
+                session.commit()
+                log.info(f"Index '{name}' is in place")
+            except Exception as e:
+                session.rollback()
+                log.warning(f"Could not create index '{name}': {e}")
+
+
 def get_db():
     db: Session = SessionLocal()
     try:
@@ -222,3 +277,148 @@ def get_db():
         )
     finally:
         db.close()
+
+
+# --- Slow query log (opt-in) ---------------------------------------------------
+# Set SLOW_QUERY_MS to record statements slower than that many milliseconds into a
+# bounded in-memory table (GET /admin/slow-queries). SLOW_QUERY_EXPLAIN=1 also captures
+# an EXPLAIN (ANALYZE, BUFFERS) plan once per statement, for SELECTs only, in the background.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "0") == "1"
+SLOW_QUERY_MAX_ENTRIES = int(os.getenv("SLOW_QUERY_MAX_ENTRIES", "100"))
+
+_IN_LIST = re.compile(r"\((?:\s*%\(\w+\)s\s*,?)+\)")
+
+
+@dataclass
+class SlowQuery:
+    sql: str  # normalized
+    caller: str
+    params_shape: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: Optional[datetime] = None
+    plan: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "caller": self.caller,
+            "params_shape": self.params_shape,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+            "plan": self.plan,
+        }
+
+
+_slow_queries: dict[str, SlowQuery] = {}
+_slow_queries_lock = threading.Lock()
+_explain_executor: Optional[ThreadPoolExecutor] = None
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and expanded IN lists so one statement shape maps to one entry."""
+    return _IN_LIST.sub("(...)", " ".join(statement.split()))
+
+
+def _params_shape(parameters) -> str:
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} x {_params_shape(parameters[0])}"
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _calling_function() -> str:
+    """The DAL function (or, failing that, the first app function) that issued the statement."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fallback = "unknown"
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(project_root) and os.sep + "infra" + os.sep not in filename:
+            location = f"{os.path.relpath(filename, project_root)}:{frame.f_code.co_name}"
+            if os.sep + "dal" + os.sep in filename:
+                return location
+            if fallback == "unknown":
+                fallback = location
+        frame = frame.f_back
+    return fallback
+
+
+def _capture_plan(key: str, statement: str, parameters) -> None:
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters).all()
+            conn.rollback()
+        plan = "\n".join(row[0] for row in rows)
+    except Exception as e:
+        plan = f"EXPLAIN failed: {e}"
+    with _slow_queries_lock:
+        if key in _slow_queries:
+            _slow_queries[key].plan = plan
+
+
+def _before_execute_timer(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+def _after_execute_slow_query(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    # The EXPLAIN worker's own statements are not recorded
+    if elapsed_ms < SLOW_QUERY_MS or threading.current_thread().name.startswith("slow-query-explain"):
+        return
+
+    key = normalize_sql(statement)
+    explain = False
+    with _slow_queries_lock:
+        entry = _slow_queries.get(key)
+        if entry is None:
+            if len(_slow_queries) >= SLOW_QUERY_MAX_ENTRIES:
+                # Keep the worst offenders: drop the entry with the least total time
+                del _slow_queries[min(_slow_queries, key=lambda k: _slow_queries[k].total_ms)]
+            entry = _slow_queries[key] = SlowQuery(
+                sql=key, caller=_calling_function(), params_shape=_params_shape(parameters),
+            )
+            # ANALYZE really runs the statement: only plain reads
+            explain = (
+                SLOW_QUERY_EXPLAIN and not executemany
+                and key.lstrip("( ").upper().startswith("SELECT") and "FOR UPDATE" not in key.upper()
+            )
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.last_seen = datetime.now(timezone.utc)
+
+    log.warning(f"Slow query ({elapsed_ms:.0f}ms) from {entry.caller}: {key[:200]}")
+    if explain and _explain_executor is not None:
+        _explain_executor.submit(_capture_plan, key, statement, parameters)
+
+
+def get_slow_queries(limit: int = 50) -> list[dict]:
+    """Recorded slow statements, worst total time first."""
+    with _slow_queries_lock:
+        entries = sorted(_slow_queries.values(), key=lambda e: e.total_ms, reverse=True)[:limit]
+        return [entry.to_dict() for entry in entries]
+
+
+def reset_slow_queries() -> None:
+    with _slow_queries_lock:
+        _slow_queries.clear()
+
+
+if SLOW_QUERY_MS > 0:
+    event.listen(engine, "before_cursor_execute", _before_execute_timer)
+    event.listen(engine, "after_cursor_execute", _after_execute_slow_query)
+    if SLOW_QUERY_EXPLAIN:
+        _explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+    log.info(f"Slow query log enabled: statements over {SLOW_QUERY_MS:.0f}ms (EXPLAIN: {SLOW_QUERY_EXPLAIN})")
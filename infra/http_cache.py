@@ -0,0 +1,67 @@
+import threading
+import uuid
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response
+
+# Unique per process start, so ETags handed out before a restart (or a re-seed
+# followed by a restart) never match the fresh state.
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class VersionCounter:
+    """
+    Monotonic in-process version for a piece of shared data (leaderboard, catalog).
+    Bump it whenever the data changes; ETags are derived from the current value.
+    Versions are per process - the app runs as a single uvicorn worker.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+    def etag(self) -> str:
+        return f'W/"{self.name}-{BOOT_ID}-{self._value}"'
+
+
+leaderboard_version = VersionCounter("leaderboard")
+dinosaur_catalog_version = VersionCounter("dinosaurs")
+
+LEADERBOARD_CACHE_CONTROL = "public, no-cache"  # store, but always revalidate
+DINOSAUR_CATALOG_CACHE_CONTROL = "public, max-age=300"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on either side
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_etag(counter: VersionCounter, cache_control: str) -> Callable[[Request, Response], str]:
+    """
+    Build a dependency that answers `304 Not Modified` when the client already holds
+    the current version. Declare it before `get_db` so a match never touches the DB or Redis.
+    """
+
+    def dependency(request: Request, response: Response) -> str:
+        etag = counter.etag()
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+    return dependency
@@ -1,22 +1,99 @@
+import json
 import sys
 import os
-from logging import DEBUG
+import threading
+import time
 
 from loguru import logger as loguru_logger
 from dotenv import load_dotenv
 
+WARNING_LEVEL_NO = 30  # warnings and errors are never sampled
+SAMPLE_MAX_KEYS = 1000  # bound on tracked sampling keys; keep bound sample_key values static
+
+
+class RateSampler:
+    """
+    Loguru filter that lets at most `per_window` records per key through in each
+    `window_sec` window. The key is the record's bound `sample_key`
+    (log.bind(sample_key=...)) or else its call site, so a hot log line is
+    throttled without touching the call. The first record of a new window carries
+    `sampled_out` - how many were dropped in the previous one.
+    """
+
+    def __init__(self, per_window: int, window_sec: float):
+        self.per_window = per_window
+        self.window_sec = window_sec
+        self._windows: dict[str, list] = {}  # key -> [window_start, emitted, dropped]
+        self._lock = threading.Lock()
+
+    def __call__(self, record) -> bool:
+        if self.per_window <= 0 or record["level"].no >= WARNING_LEVEL_NO:
+            return True
+        key = record["extra"].get("sample_key") or f"{record['name']}:{record['line']}"
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_sec:
+                if window is None and len(self._windows) >= SAMPLE_MAX_KEYS:
+                    self._windows.clear()
+                if window and window[2]:
+                    record["extra"]["sampled_out"] = window[2]
+                self._windows[key] = [now, 1, 0]
+                return True
+            if window[1] < self.per_window:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def _json_format(record) -> str:
+    """One JSON object per line, for log shippers."""
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    payload.update({key: value for key, value in record["extra"].items() if not key.startswith("_")})
+    if record["exception"]:
+        exc_type, exc_value, _ = record["exception"]
+        payload["exception"] = f"{exc_type.__name__ if exc_type else 'Exception'}: {exc_value}"
+    record["extra"]["_json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
 
 def set_log_configurations():
     """
-    set the log level by environment variable or by default info and determine colors and format log output
+    set the log level by environment variable or by default info and determine colors and format log output.
+    In production (APP_MODE=production, the default) records are written as JSON lines by a
+    background thread (enqueue), default level INFO, with per-key sampling of hot INFO/DEBUG lines.
+    Development keeps colorized text written synchronously at DEBUG.
     """
     load_dotenv()  # take environment variables from .env.
-    log_level = os.getenv("LOG_LEVEL", DEBUG)
+    app_mode = os.getenv("APP_MODE", "production").split("#")[0].strip().lower()
+    is_production = app_mode == "production"
+
+    log_level = os.getenv("LOG_LEVEL", "INFO" if is_production else "DEBUG").upper()
+    log_format = os.getenv("LOG_FORMAT", "json" if is_production else "text").lower()
+    enqueue = os.getenv("LOG_ENQUEUE", "1" if is_production else "0") == "1"
+    # Per key: at most LOG_SAMPLE_PER_WINDOW records every LOG_SAMPLE_WINDOW_SEC seconds (0 = no sampling)
+    sampler = RateSampler(
+        per_window=int(os.getenv("LOG_SAMPLE_PER_WINDOW", "20" if is_production else "0")),
+        window_sec=float(os.getenv("LOG_SAMPLE_WINDOW_SEC", "1")),
+    )
+
     logger = loguru_logger
     logger.remove()  # Default "sys.stderr" sink is not picklable
 
-    logger.add(sys.stdout, colorize=True, format="<level>{time:YYYY-MM-DD HH:mm:ss} [{level}] {message}</level>",
-               level=log_level)
+    if log_format == "json":
+        logger.add(sys.stdout, format=_json_format, level=log_level, filter=sampler, enqueue=enqueue,
+                   backtrace=False, diagnose=False)
+    else:
+        logger.add(sys.stdout, colorize=True, format="<level>{time:YYYY-MM-DD HH:mm:ss} [{level}] {message}</level>",
+                   level=log_level, filter=sampler, enqueue=enqueue)
 
     logger.level("CRITICAL", color="<red> <bold>")
     logger.level("ERROR", color="<red>")
@@ -41,4 +118,4 @@ def print_tommy_logo():
   ##     ######   ##   ##   ##   ##     ##
 """
     # Use green color for the ASCII art
-    log.info(f"{tommy_art}")
\ No newline at end of file
+    log.info(f"{tommy_art}")
@@ -0,0 +1,236 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Callable, Iterable, Optional, Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from infra.logger import log
+
+# Minimal Prometheus text-format metrics (exposition format 0.0.4), no client library needed.
+# Hot-path cost is a dict lookup and a few additions under a lock per observation.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Exposition-format lines for this metric, HELP/TYPE header included."""
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, *labels: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items()]
+        lines = self._header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+_metrics: list[_Metric] = []
+# Called on every scrape to refresh gauges that mirror external state (DB pool, Redis)
+_collectors: list[Callable[[], None]] = []
+
+
+def register(metric: _Metric) -> _Metric:
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Callable[[], None]) -> Callable[[], None]:
+    _collectors.append(collector)
+    return collector
+
+
+def render_metrics() -> str:
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            log.warning(f"Metrics collector {collector.__name__} failed: {e}")
+    lines: list[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = register(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status code.",
+    ["method", "route", "status"],
+))
+HTTP_LATENCY = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template, until the response is sent.",
+    ["method", "route"],
+))
+HTTP_IN_PROGRESS = register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ["method"],
+))
+CACHE_LOOKUPS = register(Counter(
+    "cache_lookups_total", "Cache lookups by cache and result (hit/miss); hit ratio = hit / total.",
+    ["cache", "result"],
+))
+DB_POOL = register(Gauge(
+    "db_pool_connections", "SQLAlchemy connection pool connections by state.", ["state"],
+))
+REDIS_CIRCUIT = register(Gauge(
+    "redis_circuit_open", "1 while the Redis circuit breaker short-circuits calls (open or half-open).",
+))
+REDIS_FAILURES = register(Gauge(
+    "redis_consecutive_failures", "Consecutive Redis connection errors/timeouts seen by the circuit breaker.",
+))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+@register_collector
+def _collect_db_pool() -> None:
+    from infra.database import engine
+    pool = engine.pool
+    DB_POOL.set("size", value=pool.size())
+    DB_POOL.set("checked_out", value=pool.checkedout())
+    DB_POOL.set("checked_in", value=pool.checkedin())
+    DB_POOL.set("overflow", value=max(pool.overflow(), 0))
+
+
+@register_collector
+def _collect_redis() -> None:
+    from infra.redis_client import redis_breaker
+    REDIS_CIRCUIT.set(value=0 if redis_breaker.state == "closed" else 1)
+    REDIS_FAILURES.set(value=redis_breaker.failures)
+
+
+def _route_label(scope: Scope) -> str:
+    """Route template (e.g. /admin/players/{player_id}/trends) so label cardinality stays bounded."""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unknown")
+    rule = scope.get("rate_limit_rule")
+    if rule is not None:
+        return rule.partition(" ")[2]  # rejected by RateLimitMiddleware before routing, e.g. "/admin/export/*"
+    if scope.get("endpoint") is not None:
+        return f"{scope.get('root_path', '')}/*"  # mounted app (static files)
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Record count, latency and in-flight requests per route. Routing fills in scope["route"]."""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status: Optional[int] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_PROGRESS.dec(method)
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc(method, route, str(status or 500))
+            HTTP_LATENCY.observe(method, route, value=elapsed)
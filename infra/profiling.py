@@ -0,0 +1,246 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from auth_utils import verify_token
+from infra.logger import log
+
+PROFILE_HEADER = "x-profile"  # send "X-Profile: 1" (or "memory") with an admin bearer token
+PROFILE_MEMORY = b"memory"     # also trace allocations - process-wide, see ProfilingMiddleware
+PROFILE_SAMPLE_INTERVAL_SEC = 0.005
+PROFILE_TOP_ALLOCATIONS = 25
+MAX_STORED_PROFILES = 20
+
+# Leaf frames in these modules mean a worker thread is parked, not yet running the request's call
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    method: str
+    path: str
+    status: Optional[int] = None
+    duration_ms: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)  # collapsed stack -> samples
+    allocations: list = field(default_factory=list)
+    allocated_kb: float = 0.0
+    traced_memory: bool = False
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 1),
+            "samples": self.samples,
+            "traced_memory": self.traced_memory,
+            "allocated_kb": round(self.allocated_kb, 1),
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def to_dict(self) -> dict:
+        top_stacks = [{"stack": stack, "samples": count} for stack, count in self.stacks.most_common(50)]
+        return {**self.summary(), "top_stacks": top_stacks, "top_allocations": self.allocations}
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format - feed to flamegraph.pl or speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+_profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+_profiles_lock = threading.Lock()
+_profiling = threading.Lock()  # one profiled request at a time
+
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles() -> list[dict]:
+    with _profiles_lock:
+        return [profile.summary() for profile in reversed(_profiles.values())]
+
+
+def _store(profile: RequestProfile) -> None:
+    with _profiles_lock:
+        _profiles[profile.id] = profile
+        while len(_profiles) > MAX_STORED_PROFILES:
+            _profiles.popitem(last=False)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _awaited_frames(coro) -> list:
+    """Frames of a suspended coroutine chain, outermost first."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+def _frames_from(leaf, root) -> Optional[list]:
+    """Frames from `root` down to `leaf` (outermost first), or None if root is not on leaf's stack."""
+    frames = []
+    while leaf is not None:
+        frames.append(leaf)
+        if leaf is root:
+            return frames[::-1]
+        leaf = leaf.f_back
+    return None
+
+
+class _StackSampler(threading.Thread):
+    """
+    Wall-clock sampler for one request. At a fixed interval it records the stack of
+    the request's own task: the live event-loop stack while the task runs, its
+    suspended coroutine chain while it awaits and, when it awaits a threadpool call
+    (sync dependencies such as get_db, sync endpoints), the stack of that worker
+    thread. Other requests on the loop or in the threadpool are never sampled.
+    """
+
+    def __init__(self, profile: RequestProfile, task: asyncio.Task, loop_thread_id: int):
+        super().__init__(name="request-profiler", daemon=True)
+        self.profile = profile
+        self.task = task
+        self.loop_thread_id = loop_thread_id
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(PROFILE_SAMPLE_INTERVAL_SEC):
+            frames = self._request_frames()
+            if frames:
+                self.profile.stacks[";".join(_frame_label(frame) for frame in frames)] += 1
+            self.profile.samples += 1
+
+    def _request_frames(self) -> list:
+        coro = self.task.get_coro()
+        root = getattr(coro, "cr_frame", None)
+        if root is None:
+            return []  # the task has finished
+        thread_frames = sys._current_frames()
+        running = _frames_from(thread_frames.get(self.loop_thread_id), root)
+        if running is not None:
+            return running
+        frames = _awaited_frames(coro)
+        # Awaiting anyio's run_sync: the worker thread running the call is a local of that frame
+        worker = next(
+            (value for value in frames[-1].f_locals.values() if isinstance(value, threading.Thread)), None
+        ) if frames else None
+        worker_frame = thread_frames.get(worker.ident) if worker is not None else None
+        if worker_frame is None or os.path.basename(worker_frame.f_code.co_filename) in _IDLE_MODULES:
+            return frames
+        worker_frames = []
+        while worker_frame is not None:
+            worker_frames.append(worker_frame)
+            worker_frame = worker_frame.f_back
+        return frames + worker_frames[::-1]
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+async def _is_admin(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = await verify_token(token)
+                return bool(payload) and payload.get("role") == "admin"
+    return False
+
+
+def _profile_mode(scope: Scope) -> Optional[bytes]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode() and value not in (b"", b"0"):
+            return value.lower()
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request when an admin sends `X-Profile: 1`: stack samples of
+    that request only (flame graph). The profile id comes back in X-Profile-Id;
+    fetch it from /admin/profiles/{id}. Requests without the header only pay for
+    the header scan.
+
+    `X-Profile: memory` also records the tracemalloc allocation delta. tracemalloc
+    is process-wide: the delta includes allocations of every request running
+    concurrently, and those requests pay the tracing overhead while it runs. Use it
+    on a quiet instance. Profiles are serialized, one at a time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        mode = _profile_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not await _is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _profiling.acquire(blocking=False):
+            log.info(f"Profile requested for {scope['path']} while another one is running, skipping")
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            id=uuid.uuid4().hex[:12], method=scope["method"], path=scope["path"], traced_memory=mode == PROFILE_MEMORY
+        )
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile.id
+            await send(message)
+
+        started_tracing = profile.traced_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot() if profile.traced_memory else None
+        sampler = _StackSampler(profile, asyncio.current_task(), threading.get_ident())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                diff = [d for d in after.compare_to(before, "lineno") if d.size_diff > 0]
+                profile.allocated_kb = sum(d.size_diff for d in diff) / 1024
+                profile.allocations = [
+                    {"location": str(d.traceback[0]), "size_kb": round(d.size_diff / 1024, 1), "count": d.count_diff}
+                    for d in diff[:PROFILE_TOP_ALLOCATIONS]
+                ]
+            _profiling.release()
+            _store(profile)
+            log.info(f"Profiled {profile.method} {profile.path}: {profile.duration_ms:.0f}ms, profile {profile.id}")
@@ -0,0 +1,107 @@
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from auth_utils import IS_PRODUCTION
+from infra.database import engine, normalize_sql
+from infra.logger import log
+
+# Warn when one request runs more statements than this ...
+QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "25"))
+# ... or runs the same statement shape more than this many times (likely N+1)
+REPEATED_STATEMENT_LIMIT = int(os.getenv("DB_REPEATED_STATEMENT_LIMIT", "5"))
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)  # normalized statement (params bound separately) -> runs
+
+
+# Set per request by QueryCounterMiddleware. Sync dependencies/handlers run in the
+# threadpool with a copy of the context, which still points at the same QueryStats.
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        context._request_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started = getattr(context, "_request_query_started", None)
+    if stats is None or started is None:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started
+    stats.shapes[normalize_sql(statement)] += 1
+
+
+def install_query_counter(target: Engine) -> None:
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+install_query_counter(engine)
+
+
+class QueryCounterMiddleware:
+    """
+    Count SQL statements and DB time per request. Outside production the totals are
+    returned as X-DB-Queries / X-DB-Time (ms) headers; in every mode a request over
+    QUERY_BUDGET statements, or repeating one statement more than
+    REPEATED_STATEMENT_LIMIT times, is logged as a warning.
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = not IS_PRODUCTION):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time"] = f"{stats.seconds * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_stats.reset(token)
+            _warn_if_excessive(scope, stats)
+
+
+def _warn_if_excessive(scope: Scope, stats: QueryStats) -> None:
+    if not stats.count:
+        return
+    request = f"{scope['method']} {scope['path']}"
+    if stats.count > QUERY_BUDGET:
+        log.warning(
+            f"{request} ran {stats.count} SQL statements ({stats.seconds * 1000:.1f}ms), "
+            f"budget is {QUERY_BUDGET}"
+        )
+    statement, runs = stats.shapes.most_common(1)[0]
+    if runs > REPEATED_STATEMENT_LIMIT:
+        log.warning(f"Possible N+1 in {request}: same statement ran {runs} times: {statement[:200]}")
@@ -1,31 +1,266 @@
-
-from infra.logger import log
+from collections import OrderedDict
+from dataclasses import dataclass
+import itertools
+import os
+import threading
 import time
-from fastapi import HTTPException, Request
+from infra.logger import log
+from infra.redis_client import async_redis_client
+from auth_utils import verify_token
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from typing import Optional
 import redis
+import redis.asyncio
 
 RATE_LIMIT = 20       # requests
 WINDOW_SEC = 60       # per minute
 RATE_LIMIT_MSG = "Too many requests"
 
-async def rate_limit(request: Request, redis_client: Optional[redis.Redis] = None):
-    ip = request.client.host
-    key = f"rate_limit:{ip}"
 
-    if not redis_client:
-        log.warning("Redis not configured — skipping rate limiting.")
-        return
+@dataclass(frozen=True)
+class RateLimit:
+    limit: int          # requests allowed ...
+    window_sec: int     # ... in any sliding window of this length
+    by_ip: bool = False  # always count per client IP, even with a valid bearer token
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after_ms: int  # until the oldest counted request leaves the window
+
+
+# In-process fallback while Redis is unreachable
+FALLBACK_MAX_KEYS = 10000   # LRU bound; ~300 bytes per key (entry, key, bucket), so the fallback stays around 3MB
+
+# Per-route budgets, the single place they are configured. Keys are "METHOD /path";
+# a trailing "*" matches the prefix (longest prefix wins) and all matching paths
+# share one budget. Requests not listed here are not rate limited.
+# Budgets count per player (JWT player_id) or per IP for anonymous requests;
+# by_ip rules (the credential endpoints) count per IP whatever token is sent,
+# so collecting player tokens does not buy more password attempts.
+ROUTE_LIMITS: dict[str, RateLimit] = {
+    "POST /signup": RateLimit(RATE_LIMIT, WINDOW_SEC, by_ip=True),
+    "POST /login": RateLimit(RATE_LIMIT, WINDOW_SEC, by_ip=True),
+    "POST /admin/login": RateLimit(RATE_LIMIT, WINDOW_SEC, by_ip=True),
+    "POST /start": RateLimit(30, 60),
+    "POST /answer": RateLimit(120, 60),            # a fast player answers about once a second
+    "GET /api/game_end": RateLimit(60, 60),
+    "GET /api/current_game_state": RateLimit(120, 60),
+    "GET /player_sessions_stats": RateLimit(60, 60),
+    "POST /dinosaurs/unlock": RateLimit(30, 60),
+    "POST /dinosaurs/select": RateLimit(30, 60),
+    "GET /admin/export/*": RateLimit(5, 60),       # full-table scans
+    "GET /admin/players/*": RateLimit(60, 60),     # trends, compare, stats
+    "GET /admin/summary": RateLimit(60, 60),
+    "POST /admin/players/purge": RateLimit(5, 60),
+}
+
+_EXACT_LIMITS = {rule: limit for rule, limit in ROUTE_LIMITS.items() if not rule.endswith("*")}
+_PREFIX_LIMITS = sorted(
+    ((rule[:-1], limit) for rule, limit in ROUTE_LIMITS.items() if rule.endswith("*")),
+    key=lambda item: len(item[0]),
+    reverse=True,
+)
+
+# Sliding-window log: one sorted-set member per request, scored by its time.
+# Trim, count, add and set the TTL atomically in a single round trip; the TTL
+# is always set together with the write, so no key can be left without one.
+# Time comes from the Redis server, so all app processes share one clock.
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local member = ARGV[3]
+local t = redis.call('TIME')
+local now_ms = t[1] * 1000 + math.floor(t[2] / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now_ms - window_ms)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', key, now_ms, member)
+    count = count + 1
+    allowed = 1
+end
+redis.call('PEXPIRE', key, window_ms)
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local reset_ms = window_ms
+if oldest[2] then
+    reset_ms = tonumber(oldest[2]) + window_ms - now_ms
+end
+return {allowed, limit - count, reset_ms}
+"""
+
+_sliding_window = async_redis_client.register_script(SLIDING_WINDOW_LUA)
+# Unique sorted-set members for requests landing in the same millisecond
+_member_ids = itertools.count()
+_member_prefix = f"{os.getpid()}-"
+
+
+def route_limit(method: str, path: str) -> Optional[tuple[str, RateLimit]]:
+    """The (rule, budget) that applies to a request, or None if it is not rate limited."""
+    rule = f"{method} {path}"
+    if rule in _EXACT_LIMITS:
+        return rule, _EXACT_LIMITS[rule]
+    for prefix, limit in _PREFIX_LIMITS:
+        if rule.startswith(prefix):
+            return f"{prefix}*", limit
+    return None
+
+
+async def check_rate_limit(
+    key: str,
+    limit: RateLimit,
+    client: Optional[redis.asyncio.Redis] = None,
+) -> RateLimitResult:
+    """Count one request against `key`. Raises Redis errors to the caller."""
+    script = _sliding_window if client is None else client.register_script(SLIDING_WINDOW_LUA)
+    allowed, remaining, reset_ms = await script(
+        keys=[f"rate_limit:{key}"],
+        args=[limit.limit, limit.window_sec * 1000, f"{_member_prefix}{next(_member_ids)}"],
+    )
+    return RateLimitResult(bool(allowed), limit.limit, max(int(remaining), 0), int(reset_ms))
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class LocalRateLimiter:
+    """
+    Approximate per-key limiter kept in process memory: a token bucket per key
+    (capacity = limit, refilled at limit / window), in an LRU bounded to max_keys
+    so a flood of distinct IPs cannot grow it past a fixed memory budget.
+    Per process, so with several workers the effective limit is multiplied.
+    """
 
+    def __init__(self, max_keys: int = FALLBACK_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        rate = limit.limit / limit.window_sec  # tokens per second
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _TokenBucket(limit.limit, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)  # evict least recently used
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(limit.limit, bucket.tokens + (now - bucket.updated) * rate)
+                bucket.updated = now
+
+            allowed = bucket.tokens >= 1
+            if allowed:
+                bucket.tokens -= 1
+            tokens = bucket.tokens
+        # Time until the next whole token is available
+        reset_after_ms = 0 if tokens >= limit.limit else int((1 - tokens % 1) / rate * 1000)
+        return RateLimitResult(allowed, limit.limit, int(tokens), reset_after_ms)
+
+
+local_limiter = LocalRateLimiter()
+
+
+async def limit_request(
+    key: str,
+    limit: RateLimit,
+    client: Optional[redis.asyncio.Redis] = None,
+) -> RateLimitResult:
+    """
+    Count one request against `key`: in Redis when it is reachable, otherwise in
+    the in-process fallback. While the Redis circuit breaker is open the Redis
+    call fails immediately, so the fallback adds no latency; Redis takes back
+    over once the breaker closes.
+    """
     try:
-        current = redis_client.incr(key)
-        if current == 1:
-            redis_client.expire(key, WINDOW_SEC)
-        
-        if current > RATE_LIMIT:
-            log.warning(f"Rate limit exceeded for IP {ip}")
-            raise HTTPException(status_code=429, detail=RATE_LIMIT_MSG)
-        return
+        return await check_rate_limit(key, limit, client)
     except (redis.ConnectionError, redis.TimeoutError, AttributeError) as e:
-        log.warning(f"Redis unavailable — skipping rate limiting: {e}")
-        return
+        log.debug(f"Redis unavailable, in-process rate limiting for {key}: {e}")
+        return local_limiter.hit(key, limit)
+
+
+def _client_ip(request: Request) -> str:
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def _client_identity(request: Request) -> str:
+    """Player id from a valid bearer token, the admin's name for admin tokens, else the client IP."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = await verify_token(token)
+        if payload:
+            if payload.get("player_id") is not None:
+                return f"player:{payload['player_id']}"
+            if payload.get("role") == "admin":
+                return f"admin:{payload.get('sub')}"
+    return _client_ip(request)
+
+
+def _rate_limit_headers(result: RateLimitResult) -> dict:
+    reset_sec = max(0, -(-result.reset_after_ms // 1000))
+    return {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(reset_sec),
+    }
+
+
+class RateLimitMiddleware:
+    """
+    Enforce ROUTE_LIMITS before the request reaches routing, so a rejected request
+    never opens a DB session. Adds X-RateLimit-* headers to limited routes; a 429
+    also carries Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp, client: Optional[redis.asyncio.Redis] = None):
+        self.app = app
+        self.client = client
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        matched = route_limit(scope["method"], scope["path"])
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+
+        rule, limit = matched
+        request = Request(scope)
+        identity = _client_ip(request) if limit.by_ip else await _client_identity(request)
+        result = await limit_request(f"{rule}:{identity}", limit, self.client)
+        headers = _rate_limit_headers(result)
+
+        if not result.allowed:
+            log.warning(f"Rate limit exceeded for {identity} on {rule}")
+            headers["Retry-After"] = str(max(1, int(headers["X-RateLimit-Reset"])))
+            scope["rate_limit_rule"] = rule  # routing never runs, so MetricsMiddleware labels the 429 by rule
+            response = JSONResponse({"detail": RATE_LIMIT_MSG}, status_code=429, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
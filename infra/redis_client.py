@@ -1,12 +1,209 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+
 import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
 import os
 
+from infra.logger import log
+
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")  # Default to localhost for local dev
 REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+# Redis is only a cache here: better to give up quickly than to hold a request
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))  # seconds
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))    # seconds, per read/write
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive connection errors / timeouts that open the circuit
+BREAKER_COOLDOWN_SEC = 10      # how long every call is short-circuited before Redis is tried again
+
+
+class CircuitOpenError(redis.ConnectionError):
+    """Raised instead of calling Redis while the circuit is open (caught like any connection error)."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` failures every call
+    is rejected immediately for `cooldown_sec`; then a single trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_sec: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown_sec:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown_sec or self._probing:
+                return False
+            self._probing = True  # this caller is the trial call
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                log.info(f"{self.name} circuit closed, Redis is reachable again")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    log.warning(
+                        f"{self.name} circuit open after {self._failures} failures, "
+                        f"skipping Redis for {self.cooldown_sec}s"
+                    )
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Let the next caller probe again when a trial call ended without a verdict (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+
+redis_breaker = CircuitBreaker("redis", BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN_SEC)
+
+
+def _check_circuit() -> None:
+    if not redis_breaker.allow():
+        raise CircuitOpenError("Redis circuit is open")
+
+
+@contextmanager
+def _guarded_call():
+    """
+    Run one Redis round trip behind the breaker. Only connection errors and
+    timeouts count as failures; an error reply (NOSCRIPT, WRONGTYPE...) means
+    Redis answered, so it counts as a success. The half-open probe is always
+    released, even when the call is cancelled.
+    """
+    _check_circuit()
+    try:
+        yield
+    except (redis.ConnectionError, redis.TimeoutError):
+        redis_breaker.record_failure()
+        raise
+    except redis.RedisError:
+        redis_breaker.record_success()
+        raise
+    else:
+        redis_breaker.record_success()
+    finally:
+        redis_breaker.release_probe()
 
 
-redis_client = redis.Redis(
+class _GuardedPipeline(redis.client.Pipeline):
+    def execute(self, raise_on_error=True):
+        with _guarded_call():
+            return super().execute(raise_on_error)
+
+
+class _GuardedRedis(redis.Redis):
+    """Sync client behind the circuit breaker (for worker threads and scripts)."""
+
+    def execute_command(self, *args, **options):
+        with _guarded_call():
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return _GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class _GuardedAsyncPipeline(redis.asyncio.client.Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        with _guarded_call():
+            return await super().execute(raise_on_error)
+
+
+class _GuardedAsyncRedis(redis.asyncio.Redis):
+    """Async client behind the circuit breaker (for code running on the event loop)."""
+
+    async def execute_command(self, *args, **options):
+        with _guarded_call():
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+        return _GuardedAsyncPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class LoopBoundConnectionPool:
+    """
+    One BlockingConnectionPool per event loop. asyncio connections (and the pool's
+    Condition) belong to the loop that created them, so a single module-global pool
+    breaks on the second loop that uses it (asyncio.run twice, a TestClient used
+    without `with`). Attribute access is delegated to the running loop's pool.
+    """
+
+    def __init__(self, **connection_kwargs):
+        self._connection_kwargs = connection_kwargs
+        self._template = redis.asyncio.BlockingConnectionPool(**connection_kwargs)  # outside any loop
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.asyncio.BlockingConnectionPool]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _current(self) -> redis.asyncio.BlockingConnectionPool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._template
+        with self._lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = self._pools[loop] = redis.asyncio.BlockingConnectionPool(**self._connection_kwargs)
+        return pool
+
+    def __getattr__(self, name):
+        return getattr(self._current(), name)
+
+
+redis_client = _GuardedRedis(
     host=REDIS_HOST,
     port=REDIS_PORT,
-    decode_responses=True
+    decode_responses=True,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+)
+
+# Shared pool (per event loop) for code running on the loop - awaits instead of blocking it.
+# When all connections are busy a caller waits up to the socket timeout for one.
+async_redis_pool = LoopBoundConnectionPool(
+    host=REDIS_HOST,
+    port=int(REDIS_PORT),
+    decode_responses=True,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_SOCKET_TIMEOUT,
 )
+async_redis_client = _GuardedAsyncRedis(connection_pool=async_redis_pool)
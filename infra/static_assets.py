@@ -0,0 +1,78 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from infra.logger import log
+
+# Output of scripts/build_image_assets.py: resized, content-hashed image variants
+DIST_DIR = Path("static/dist")
+DIST_URL_PREFIX = "/static/dist"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+
+# Hashed filenames never change content, so browsers may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_IMAGE_FORMAT = "webp"
+
+
+def _accepts_avif(scope: Scope) -> bool:
+    for media_range in Headers(scope=scope).get("accept", "").split(","):
+        media_type, _, params = media_range.partition(";")
+        if media_type.strip() == "image/avif":
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles for content-hashed assets: every response is cacheable for a year.
+    Image URLs handed out by resolve_image_path are negotiated: browsers that send
+    `Accept: image/avif` get the AVIF variant of the same image, with `Vary: Accept`.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    async def get_response(self, path: str, scope: Scope):
+        avif_name = avif_alternatives().get(path)
+        if avif_name is None:
+            return await super().get_response(path, scope)
+        response = await super().get_response(avif_name if _accepts_avif(scope) else path, scope)
+        response.headers["Vary"] = "Accept"
+        return response
+
+
+@lru_cache(maxsize=1)
+def asset_manifest() -> dict:
+    """Original image path -> {format: hashed URL}. Empty when the asset build has not run."""
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        log.info(f"No image asset manifest at {MANIFEST_PATH}, serving original images")
+        return {}
+    except (OSError, ValueError) as e:
+        log.warning(f"Could not read image asset manifest {MANIFEST_PATH}: {e}")
+        return {}
+
+
+def avif_alternatives() -> dict:
+    """Default variant file name (as resolved by resolve_image_path) -> its AVIF file name, inside DIST_DIR."""
+    alternatives = {}
+    for variants in asset_manifest().values():
+        default = variants.get(DEFAULT_IMAGE_FORMAT) or variants.get("png")
+        if default and variants.get("avif"):
+            alternatives[Path(default).name] = Path(variants["avif"]).name
+    return alternatives
+
+
+def resolve_image_path(path: str, image_format: str = DEFAULT_IMAGE_FORMAT) -> str:
+    """Map an original /static image path to its hashed variant, falling back to the original."""
+    variants = asset_manifest().get(path)
+    if not variants:
+        return path
+    return variants.get(image_format) or variants.get("png") or path
@@ -4,6 +4,7 @@ from routes.auth_routes import router as auth_router
 from routes.pages import router as pages_router
 from routes.admin_routes import router as admin_router
 from routes.dinosaur_routes import router as dinosaur_router
+from routes.metrics_routes import router as metrics_router
 from app import app
 
 
@@ -12,6 +13,7 @@ app.include_router(auth_router)
 app.include_router(pages_router)
 app.include_router(admin_router)
 app.include_router(dinosaur_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, TIMESTAMP, JSON, Table
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, TIMESTAMP, JSON, Table, Date
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 
@@ -71,6 +71,8 @@ class PlayerSession(Base):
     winning_score = Column(Integer, nullable=False, default=2, server_default="2")
     started_at = Column(TIMESTAMP, server_default=func.now())
     ended_at = Column(TIMESTAMP, nullable=True)
+    # True once this completed session is counted in player_daily_stats
+    rolled_up = Column(Boolean, nullable=False, default=False, server_default="false")
 
     player = relationship("Player", back_populates="sessions")
     game = relationship("Game", back_populates="sessions")
@@ -91,6 +93,23 @@ class PlayerAnswer(Base):
     question = relationship("Question", back_populates="answers")
 
 
+class PlayerDailyStats(Base):
+    """
+    Per player per day rollup of completed sessions, maintained at end_session.
+    Sessions with rolled_up = False are not counted here yet (see backfill).
+    """
+    __tablename__ = "player_daily_stats"
+
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    games = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    incorrect = Column(Integer, nullable=False, default=0)
+    first_ended_at = Column(TIMESTAMP, nullable=True)
+    last_ended_at = Column(TIMESTAMP, nullable=True)
+
+
 class Dinosaur(Base):
     __tablename__ = "dinosaurs"
 
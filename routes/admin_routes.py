@@ -1,15 +1,25 @@
-from typing import Optional, List
+from typing import Optional, List, Iterator
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import csv
+import io
+import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.orm import Session, load_only
 from pydantic import BaseModel
 from auth_utils import get_current_admin, create_access_token, ADMIN_USERNAME, ADMIN_PASSWORD
-from infra.database import get_db
-from models import Player
-from dal.player_session_dal import get_last_player_sessions
+from infra.database import get_db, get_slow_queries, reset_slow_queries, SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN
+from infra.profiling import get_profile, list_profiles
+from models import Player, PlayerSession
+from dal.player_session_dal import get_last_player_sessions, get_last_sessions_for_players
 from dal.player_answer_dal import get_wrong_questions
-from dal.player_trends_dal import get_player_trends_by_period, compare_player_periods
+from dal.player_trends_dal import get_player_trends_by_period, compare_player_periods, MAX_COMPARE_PERIODS
+from dal.admin_summary_dal import get_admin_summary
+from dal.dinosaur_dal import refresh_dinosaur_catalog
+from dal.export_dal import EXPORT_QUERIES, export_columns, stream_export_rows
+from dal.player_purge_dal import create_purge_job, get_purge_job, run_purge_job, MAX_PURGE_PLAYERS
 from dal.player_dal import (
+    list_players,
     delete_player as delete_player_dal,
     exclude_player_from_leaderboard,
     include_player_in_leaderboard
@@ -17,6 +27,9 @@ from dal.player_dal import (
 
 router = APIRouter()
 
+MAX_BATCH_PLAYERS = 100
+EXPORT_CHUNK_ROWS = 500  # rows per chunk written to the streaming response
+
 
 class AdminLoginRequest(BaseModel):
     username: str
@@ -33,10 +46,14 @@ class PlayerListItem(BaseModel):
 
 class PlayersListResponse(BaseModel):
     players: List[PlayerListItem]
-    total: int
+    total: Optional[int]  # None on cursor pages unless include_total=true
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int]
+    # Keyset pagination: pass back as `cursor` to get the next page
+    next_cursor: Optional[str] = None
+    # True when `total` is a planner estimate rather than an exact count
+    total_is_estimate: bool = False
 
 
 @router.post("/admin/login", tags=["Admin"])
@@ -58,31 +75,42 @@ async def admin_login(req: AdminLoginRequest):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.get("/admin/summary", tags=["Admin"])
+async def get_summary(
+    admin: dict = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Dashboard KPIs: total players, sessions today, total answers, accuracy and
+    active players. Served from incrementally maintained counters and cached for
+    a few seconds; `source`, `generated_at` and `counters_seeded_at` tell how fresh it is.
+    """
+    return await get_admin_summary(db)
+
+
 @router.get("/admin/players", tags=["Admin"])
 async def get_players(
-    page: int = 1,
-    page_size: int = 10,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)"),
+    include_total: Optional[bool] = Query(None, description="count matching players (default: only without a cursor)"),
     admin: dict = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """
     Get list of players with pagination and search by name.
+    Pass `cursor` for keyset pagination; `page` alone still works (OFFSET based).
+    Cursor pages skip the total (it was returned with the first page) unless include_total=true.
     """
-    query = db.query(Player)
-    
-    # Search by name if provided
-    if search:
-        query = query.filter(Player.name.ilike(f"%{search}%"))
-    
-    # Get total count
-    total = query.count()
-    
-    # Pagination
-    offset = (page - 1) * page_size
-    players = query.order_by(Player.created_at.desc()).offset(offset).limit(page_size).all()
-    
-    total_pages = (total + page_size - 1) // page_size
+    try:
+        result = await list_players(
+            db, page_size=page_size, cursor=cursor, page=page, search=search, include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total_pages = (result.total + page_size - 1) // page_size if result.total is not None else None
     
     return PlayersListResponse(
         players=[
@@ -93,34 +121,22 @@ async def get_players(
                 created_at=p.created_at.isoformat() if p.created_at else "",
                 excluded_from_leaderboard=p.excluded_from_leaderboard or False
             )
-            for p in players
+            for p in result.players
         ],
-        total=total,
+        total=result.total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=result.next_cursor,
+        total_is_estimate=result.total_is_estimate
     )
 
 
-@router.get("/admin/players/{player_id}/stats", tags=["Admin"])
-async def get_player_stats_admin(
-    player_id: int,
-    admin: dict = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """
-    Get player statistics (same as what player sees).
-    """
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        raise HTTPException(status_code=404, detail="Player not found")
-    
-    player_sessions = await get_last_player_sessions(db, player.id)
+async def _player_stats_response(player: Player, player_sessions: list[PlayerSession]) -> dict:
     player_stats_list = [
-        await get_wrong_questions(player_session) 
+        await get_wrong_questions(player_session)
         for player_session in player_sessions
     ]
-    
     return {
         "player_name": player.name,
         "player_id": player.id,
@@ -136,6 +152,51 @@ async def get_player_stats_admin(
     }
 
 
+@router.get("/admin/players/stats", tags=["Admin"])
+async def get_players_stats_batch(
+    ids: List[int] = Query(..., description="Player ids, repeatable (ids=1&ids=2)"),
+    admin: dict = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Get player statistics for many players in one request (e.g. a whole dashboard page).
+    Runs a fixed number of queries regardless of how many players are requested.
+    """
+    player_ids = list(dict.fromkeys(ids))
+    if len(player_ids) > MAX_BATCH_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PLAYERS} players per request")
+
+    players = db.query(Player).options(load_only(Player.id, Player.name)).filter(Player.id.in_(player_ids)).all()
+    players_by_id = {p.id: p for p in players}
+    sessions_by_player = await get_last_sessions_for_players(db, list(players_by_id))
+
+    return {
+        "players": [
+            await _player_stats_response(players_by_id[player_id], sessions_by_player[player_id])
+            for player_id in player_ids
+            if player_id in players_by_id
+        ],
+        "not_found": [player_id for player_id in player_ids if player_id not in players_by_id]
+    }
+
+
+@router.get("/admin/players/{player_id}/stats", tags=["Admin"])
+async def get_player_stats_admin(
+    player_id: int,
+    admin: dict = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Get player statistics (same as what player sees).
+    """
+    player = db.query(Player).filter(Player.id == player_id).first()
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+    
+    player_sessions = await get_last_player_sessions(db, player.id)
+    return await _player_stats_response(player, player_sessions)
+
+
 @router.get("/admin/players/{player_id}/trends", tags=["Admin"])
 async def get_player_trends(
     player_id: int,
@@ -173,34 +234,50 @@ async def get_player_trends(
     }
 
 
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
 @router.get("/admin/players/{player_id}/compare", tags=["Admin"])
 async def compare_player_periods_api(
     player_id: int,
-    period1_start: str = Query(..., description="ISO format datetime for period 1 start"),
-    period1_end: str = Query(..., description="ISO format datetime for period 1 end"),
-    period2_start: str = Query(..., description="ISO format datetime for period 2 start"),
-    period2_end: str = Query(..., description="ISO format datetime for period 2 end"),
+    period1_start: Optional[str] = Query(None, description="ISO format datetime for period 1 start"),
+    period1_end: Optional[str] = Query(None, description="ISO format datetime for period 1 end"),
+    period2_start: Optional[str] = Query(None, description="ISO format datetime for period 2 start"),
+    period2_end: Optional[str] = Query(None, description="ISO format datetime for period 2 end"),
+    period: Optional[List[str]] = Query(None, description="Extra periods as 'start/end' ISO datetimes, repeatable"),
     admin: dict = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """
-    Compare player performance between two time periods.
+    Compare player performance between time periods.
+    Accepts period1/period2 pairs and/or any number of repeated `period=start/end` values.
     """
     player = db.query(Player).filter(Player.id == player_id).first()
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
     try:
-        p1_start = datetime.fromisoformat(period1_start.replace('Z', '+00:00'))
-        p1_end = datetime.fromisoformat(period1_end.replace('Z', '+00:00'))
-        p2_start = datetime.fromisoformat(period2_start.replace('Z', '+00:00'))
-        p2_end = datetime.fromisoformat(period2_end.replace('Z', '+00:00'))
+        periods = []
+        for start, end in ((period1_start, period1_end), (period2_start, period2_end)):
+            if start or end:
+                if not (start and end):
+                    raise ValueError("both start and end are required for a period")
+                periods.append((_parse_iso(start), _parse_iso(end)))
+        for value in period or []:
+            start, sep, end = value.partition("/")
+            if not sep:
+                raise ValueError(f"expected 'start/end', got '{value}'")
+            periods.append((_parse_iso(start), _parse_iso(end)))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {e}")
 
-    comparison = await compare_player_periods(
-        db, player_id, p1_start, p1_end, p2_start, p2_end
-    )
+    if not periods:
+        raise HTTPException(status_code=400, detail="At least one period is required")
+    if len(periods) > MAX_COMPARE_PERIODS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPARE_PERIODS} periods can be compared")
+
+    comparison = await compare_player_periods(db, player_id, periods)
 
     return {
         "player_name": player.name,
@@ -233,6 +310,44 @@ async def delete_player_admin(
     }
 
 
+class PurgePlayersRequest(BaseModel):
+    player_ids: List[int]
+
+
+@router.post("/admin/players/purge", tags=["Admin"], status_code=202)
+async def purge_players(
+    req: PurgePlayersRequest,
+    background_tasks: BackgroundTasks,
+    admin: dict = Depends(get_current_admin)
+):
+    """
+    Delete many players (and all related data) in chunked background batches.
+    Returns a job id; poll GET /admin/players/purge/{job_id} for progress.
+    """
+    if not req.player_ids:
+        raise HTTPException(status_code=400, detail="player_ids must not be empty")
+    if len(req.player_ids) > MAX_PURGE_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PURGE_PLAYERS} players per purge job")
+
+    job = create_purge_job(req.player_ids)
+    if job is None:
+        raise HTTPException(status_code=429, detail="Too many purge jobs in progress, try again later")
+    background_tasks.add_task(run_purge_job, job.id)
+    return job.to_dict()
+
+
+@router.get("/admin/players/purge/{job_id}", tags=["Admin"])
+async def get_purge_progress(
+    job_id: str,
+    admin: dict = Depends(get_current_admin)
+):
+    """Progress of a bulk purge job."""
+    job = get_purge_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return job.to_dict()
+
+
 @router.post("/admin/players/{player_id}/exclude-from-leaderboard", tags=["Admin"])
 async def exclude_from_leaderboard(
     player_id: int,
@@ -276,3 +391,128 @@ async def include_in_leaderboard(
         "excluded_from_leaderboard": updated_player.excluded_from_leaderboard
     }
 
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_chunks(rows: Iterator[dict]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({k: _export_value(v) for k, v in row.items()}, ensure_ascii=False))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines.clear()
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _csv_chunks(columns: List[str], rows: Iterator[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(["" if row[c] is None else _export_value(row[c]) for c in columns])
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+@router.post("/admin/dinosaurs/reload", tags=["Admin"])
+async def reload_dinosaur_catalog(
+    admin: dict = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Reload the in-process dinosaur catalog after the dinosaurs table was changed
+    (e.g. by scripts/create_dinosaurs.py). Also invalidates cached /dinosaurs/available responses.
+    """
+    catalog = await refresh_dinosaur_catalog(db)
+    return {"message": "Dinosaur catalog reloaded", "count": len(catalog.dinosaurs), "version": catalog.version}
+
+
+@router.get("/admin/slow-queries", tags=["Admin"])
+async def get_slow_query_log(
+    limit: int = Query(50, ge=1, le=500),
+    admin: dict = Depends(get_current_admin)
+):
+    """
+    Statements slower than SLOW_QUERY_MS since startup (or the last reset), worst total time first,
+    with normalized SQL, parameter shape, calling DAL function and EXPLAIN plan when captured.
+    """
+    return {
+        "enabled": SLOW_QUERY_MS > 0,
+        "threshold_ms": SLOW_QUERY_MS,
+        "explain": SLOW_QUERY_EXPLAIN,
+        "queries": get_slow_queries(limit),
+    }
+
+
+@router.delete("/admin/slow-queries", tags=["Admin"])
+async def clear_slow_query_log(admin: dict = Depends(get_current_admin)):
+    """Forget recorded slow queries, e.g. after deploying a fix."""
+    reset_slow_queries()
+    return {"message": "Slow query log cleared"}
+
+
+@router.get("/admin/profiles", tags=["Admin"])
+async def get_request_profiles(admin: dict = Depends(get_current_admin)):
+    """
+    Recent profiled requests, newest first. Profile a request by sending it with
+    `X-Profile: 1` and an admin token; its id comes back in the X-Profile-Id header.
+    `X-Profile: memory` adds a process-wide tracemalloc delta.
+    """
+    return {"profiles": list_profiles()}
+
+
+@router.get("/admin/profiles/{profile_id}", tags=["Admin"])
+async def get_request_profile(profile_id: str, admin: dict = Depends(get_current_admin)):
+    """Hottest stacks of one profiled request, plus the largest allocation deltas in memory mode."""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.to_dict()
+
+
+@router.get("/admin/profiles/{profile_id}/collapsed", tags=["Admin"], response_class=PlainTextResponse)
+async def get_request_profile_collapsed(profile_id: str, admin: dict = Depends(get_current_admin)):
+    """Stack samples in collapsed (folded) format, for flamegraph.pl or speedscope."""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
+
+
+@router.get("/admin/export/{entity}", tags=["Admin"])
+async def export_data(
+    entity: str,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    start: Optional[datetime] = Query(None, description="Only rows at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only rows at or before this time"),
+    player_id: Optional[int] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    """
+    Stream players, sessions or answers as NDJSON or CSV.
+    Rows come from a server-side cursor, so memory use is constant for any table size.
+    """
+    if entity not in EXPORT_QUERIES:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{entity}'. Choose one of: {', '.join(EXPORT_QUERIES)}")
+
+    rows = stream_export_rows(entity, start=start, end=end, player_id=player_id)
+    if format == "csv":
+        body = _csv_chunks(export_columns(entity), rows)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        body = _ndjson_chunks(rows)
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'}
+    )
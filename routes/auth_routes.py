@@ -1,6 +1,6 @@
 from typing import Optional
 
-from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from starlette.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
@@ -8,8 +8,6 @@ import bcrypt
 from auth_utils import create_access_token, get_current_player
 from dal.player_dal import get_player_by_name, create_player
 from infra.database import get_db
-from infra.rate_limiter import rate_limit
-from infra.redis_client import redis_client
 from models import Player
 from fastapi.security import OAuth2PasswordRequestForm
 
@@ -34,13 +32,10 @@ async def player_info(current_player=Depends(get_current_player)):
 
 @router.post("/signup", tags=["Auth"])
 async def signup(
-    request: Request,
     req: SignupRequest,
     db: Session = Depends(get_db),
 ):
-    # rate limit to prevent signup abuse
-    await rate_limit(request, redis_client)
-
+    # Rate limited per IP by RateLimitMiddleware (infra/rate_limiter.py)
     existing_player: Optional[Player] = await get_player_by_name(db, req.name)
     if existing_player:
         raise HTTPException(status_code=400, detail="User already exists")
@@ -62,12 +57,10 @@ async def signup(
 
 @router.post("/login", tags=["Auth"])
 async def login(
-    request: Request,
     req: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
-    # rate limit by IP address
-    await rate_limit(request, redis_client)
+    # Rate limited per IP by RateLimitMiddleware (infra/rate_limiter.py)
     player: Optional[Player] = await get_player_by_name(db, req.username)
     if not player:
          raise HTTPException(status_code=404, detail="Invalid player")
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 
 from infra.database import get_db
+from infra.http_cache import conditional_etag, dinosaur_catalog_version, DINOSAUR_CATALOG_CACHE_CONTROL
 from infra.logger import log
 from auth_utils import get_current_player
 from dal.dinosaur_dal import (
-    get_all_dinosaurs,
+    get_current_dinosaur_catalog,
+    get_dinosaur_catalog,
     get_player_dinosaurs,
-    unlock_dinosaur_for_player,
+    unlock_and_select_dinosaur,
     select_dinosaur_for_player,
     get_selected_dinosaur
 )
@@ -40,20 +42,21 @@ class SelectDinosaurRequest(BaseModel):
 @router.get("/dinosaurs/available", tags=["Dinosaurs"], response_model=List[DinosaurResponse])
 async def get_available_dinosaurs(
     current_player: dict = Depends(get_current_player),
-    db: Session = Depends(get_db)
+    etag: str = Depends(conditional_etag(dinosaur_catalog_version, DINOSAUR_CATALOG_CACHE_CONTROL)),
 ):
     """
     Get all available dinosaurs in the system.
+    Answers 304 when the client's ETag matches the current catalog version;
+    otherwise sends the catalog's pre-serialized body. Served from the in-memory
+    snapshot, so no DB session is opened.
     """
     try:
-        dinosaurs = await get_all_dinosaurs(db)
-        return [DinosaurResponse(
-            id=d.id,
-            name=d.name,
-            image_path=d.image_path,
-            description=d.description,
-            level=d.level
-        ) for d in dinosaurs]
+        catalog = await get_current_dinosaur_catalog()
+        return Response(
+            content=catalog.available_json,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": DINOSAUR_CATALOG_CACHE_CONTROL},
+        )
     except Exception as e:
         log.error(f"Error fetching dinosaurs: {e}")
         raise HTTPException(
@@ -77,13 +80,7 @@ async def get_my_dinosaurs(
             raise HTTPException(status_code=404, detail="Player not found")
         
         dinosaurs = await get_player_dinosaurs(db, player.id)
-        return [DinosaurResponse(
-            id=d.id,
-            name=d.name,
-            image_path=d.image_path,
-            description=d.description,
-            level=d.level
-        ) for d in dinosaurs]
+        return [d.to_dict() for d in dinosaurs]
     except HTTPException:
         raise
     except Exception as e:
@@ -112,13 +109,7 @@ async def get_my_selected_dinosaur(
         if not dinosaur:
             return None
         
-        return DinosaurResponse(
-            id=dinosaur.id,
-            name=dinosaur.name,
-            image_path=dinosaur.image_path,
-            description=dinosaur.description,
-            level=dinosaur.level
-        )
+        return dinosaur.to_dict()
     except HTTPException:
         raise
     except Exception as e:
@@ -147,34 +138,22 @@ async def unlock_dinosaur(
             raise HTTPException(status_code=404, detail="Player not found")
         
         # Check if dinosaur exists
-        from dal.dinosaur_dal import get_all_dinosaurs
-        dinosaurs = await get_all_dinosaurs(db)
-        dinosaur = next((d for d in dinosaurs if d.id == req.dinosaur_id), None)
-        if not dinosaur:
+        catalog = await get_dinosaur_catalog(db)
+        if req.dinosaur_id not in catalog.by_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Dinosaur not found"
             )
         
-        # Try to unlock (if already unlocked, this will return False but that's OK)
-        success = await unlock_dinosaur_for_player(db, player.id, req.dinosaur_id)
-        
-        # If already unlocked, just select it
-        if not success:
-            # Check if player actually has this dinosaur
-            player_dinosaurs = await get_player_dinosaurs(db, player.id)
-            has_dinosaur = any(d.id == req.dinosaur_id for d in player_dinosaurs)
-            if not has_dinosaur:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to unlock dinosaur"
-                )
-            # Already has it, just select it
-            await select_dinosaur_for_player(db, player.id, req.dinosaur_id)
+        # Unlock (no-op if already in the collection) and select, in one statement
+        already_unlocked = await unlock_and_select_dinosaur(db, player.id, req.dinosaur_id)
+        if already_unlocked is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to unlock dinosaur"
+            )
+        if already_unlocked:
             return {"message": "Dinosaur already unlocked, selected successfully", "dinosaur_id": req.dinosaur_id, "already_unlocked": True}
-        
-        # Newly unlocked, also select it
-        await select_dinosaur_for_player(db, player.id, req.dinosaur_id)
         return {"message": "Dinosaur unlocked and selected successfully", "dinosaur_id": req.dinosaur_id, "already_unlocked": False}
     except HTTPException:
         raise
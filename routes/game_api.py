@@ -18,8 +18,8 @@ from dal.player_session_dal import (
 )
 from dal.question_dal import get_random_question_by_game, get_question_by_id
 from infra.database import get_db
+from infra.http_cache import conditional_etag, leaderboard_version, LEADERBOARD_CACHE_CONTROL
 from infra.logger import log
-from infra.rate_limiter import rate_limit
 from infra.redis_client import redis_client
 from models import PlayerSession, Question, Player, Game
 import redis
@@ -186,7 +186,7 @@ async def game_end_data(
     player_session: Optional[PlayerSession] = await get_session_by_player_id(db, player.id)
     if not player_session:
         raise HTTPException(status_code=404, detail="No active session found for player")
-    # שימוש באותו endpoint של top_players
+    # שימוש באותו endpoint של top_players (נשלף מה-snapshot בזיכרון כל עוד הגרסה לא השתנתה)
     top_players: List[PlayerScore] = await get_top_players(db, limit=10)
     
     # חשב את הדירוג של השחקן לפי הניקוד הגבוה ביותר שלו
@@ -219,6 +219,7 @@ async def get_last_player_sessions_data(current_player=Depends(get_current_playe
 @router.get("/api/top_players", tags=["Game"])
 async def get_top_players_api(
     current_player=Depends(get_current_player),
+    etag: str = Depends(conditional_etag(leaderboard_version, LEADERBOARD_CACHE_CONTROL)),
     db: Session = Depends(get_db)
 ):
     top_players: List[PlayerScore] = await get_top_players(db, limit=10)
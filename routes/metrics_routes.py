@@ -0,0 +1,25 @@
+import os
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from infra.metrics import render_metrics, CONTENT_TYPE
+
+router = APIRouter()
+
+# When set, scrapers must send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Prometheus text exposition: per-route request counts and latency histograms,
+    in-flight requests, cache hit/miss counters, DB pool and Redis breaker state.
+    """
+    if METRICS_TOKEN:
+        expected = f"Bearer {METRICS_TOKEN}"
+        if not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
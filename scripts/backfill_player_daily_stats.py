@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Backfill the player_daily_stats rollup from completed sessions that are not
+rolled up yet (sessions finished before the rollup existed, or inserted
+directly such as by generate_dummy_users.py). Safe to re-run at any time.
+
+Usage: python scripts/backfill_player_daily_stats.py [batch_size]
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from infra.database import SessionLocal
+from dal.player_daily_stats_dal import backfill_daily_stats, BACKFILL_BATCH_SIZE
+from infra.logger import log
+
+
+async def main(batch_size: int):
+    db = SessionLocal()
+    try:
+        total = await backfill_daily_stats(db, batch_size=batch_size)
+        log.info(f"Backfill complete: {total} sessions rolled up")
+    except Exception as e:
+        db.rollback()
+        log.error(f"Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else BACKFILL_BATCH_SIZE
+    asyncio.run(main(batch_size))
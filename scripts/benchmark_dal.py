@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the hot DAL functions against seeded datasets of increasing size.
+For every size (number of player_answers rows) the script seeds benchmark players,
+sessions and answers, times each function (cold: in-process and Redis caches are
+dropped before every call, so the database path is measured), counts its SQL
+statements, then removes the seeded data.
+
+Results are compared with a JSON baseline; a function whose median time grows more
+than --threshold (and by more than NOISE_FLOOR_MS), or which runs more statements
+than before, is flagged and the script exits with status 1.
+
+Usage:
+    python scripts/benchmark_dal.py --save-baseline              # record the baseline
+    python scripts/benchmark_dal.py                              # compare against it
+    python scripts/benchmark_dal.py --sizes 1000,100000 --threshold 0.3
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import redis
+from sqlalchemy import event, delete, select
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from infra.database import SessionLocal, engine
+from infra.redis_client import redis_client
+from models import Player, Game, PlayerSession, PlayerAnswer, Question, PlayerDailyStats
+from dal.question_dal import get_random_question_by_game
+from dal.player_session_dal import (
+    should_advance_stage, get_top_players, get_player_rank, get_last_player_sessions, _top_players_snapshot
+)
+from dal.player_trends_dal import get_player_trends_by_period
+from dal.player_daily_stats_dal import rollup_sessions
+from infra.logger import log
+
+BENCH_PLAYER_PREFIX = "__bench_dal__"
+DEFAULT_SIZES = "1000,100000,1000000"
+DEFAULT_BASELINE = project_root / "scripts" / "dal_benchmark_baseline.json"
+ANSWERS_PER_SESSION = 10
+SESSIONS_PER_PLAYER = 20
+TARGET_SESSION_SHARE = 0.05  # the measured player owns this share of all sessions (a heavy player)
+INSERT_BATCH_SIZE = 5000
+RUNS = 7
+NOISE_FLOOR_MS = 1.0         # ignore slowdowns smaller than this, whatever the ratio
+
+
+def seed(db, num_answers: int) -> dict:
+    game = db.query(Game).first()
+    question_ids = db.scalars(select(Question.id).where(Question.game_id == game.id)).all() if game else []
+    if not game or not question_ids:
+        raise RuntimeError("Need at least one game and question - start the app once to seed them")
+
+    num_sessions = max(1, num_answers // ANSWERS_PER_SESSION)
+    num_players = max(2, num_sessions // SESSIONS_PER_PLAYER)
+    players = [
+        {"name": f"{BENCH_PLAYER_PREFIX}{i}", "age": 8, "password": "x", "excluded_from_leaderboard": False}
+        for i in range(num_players)
+    ]
+    db.execute(Player.__table__.insert(), players)
+    db.commit()
+    player_ids = db.scalars(
+        select(Player.id).where(Player.name.like(f"{BENCH_PLAYER_PREFIX}%")).order_by(Player.id)
+    ).all()
+    target_player_id = player_ids[0]
+
+    now = datetime.now()
+    target_sessions = max(SESSIONS_PER_PLAYER, int(num_sessions * TARGET_SESSION_SHARE))
+    batch = []
+    for i in range(num_sessions):
+        started_at = now - timedelta(days=random.randint(0, 365), minutes=random.randint(0, 1440))
+        batch.append({
+            "player_id": target_player_id if i < target_sessions else random.choice(player_ids[1:]),
+            "game_id": game.id,
+            "score": random.randint(0, 10),
+            "stage": random.randint(1, 3),
+            "started_at": started_at,
+            "ended_at": started_at + timedelta(minutes=10),
+        })
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.execute(PlayerSession.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        db.execute(PlayerSession.__table__.insert(), batch)
+    db.commit()
+
+    session_ids = db.scalars(select(PlayerSession.id).where(PlayerSession.player_id.in_(player_ids))).all()
+    batch = []
+    for session_id in session_ids:
+        for _ in range(ANSWERS_PER_SESSION):
+            batch.append({
+                "session_id": session_id,
+                "question_id": random.choice(question_ids),
+                "player_answer": 0,
+                "is_correct": random.random() > 0.3,
+            })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                db.execute(PlayerAnswer.__table__.insert(), batch)
+                batch.clear()
+    if batch:
+        db.execute(PlayerAnswer.__table__.insert(), batch)
+    db.commit()
+
+    # Trends are read from player_daily_stats in the steady state
+    rollup_sessions(db, PlayerSession.player_id.in_(player_ids))
+    db.commit()
+
+    latest_session_id = db.scalar(
+        select(PlayerSession.id).where(PlayerSession.player_id == target_player_id)
+        .order_by(PlayerSession.started_at.desc()).limit(1)
+    )
+    return {"player_id": target_player_id, "game_id": game.id, "session_id": latest_session_id,
+            "players": num_players, "sessions": num_sessions}
+
+
+def cleanup(db) -> None:
+    player_ids = select(Player.id).where(Player.name.like(f"{BENCH_PLAYER_PREFIX}%")).scalar_subquery()
+    session_ids = select(PlayerSession.id).where(PlayerSession.player_id.in_(player_ids))
+    db.execute(delete(PlayerAnswer).where(PlayerAnswer.session_id.in_(session_ids)))
+    db.execute(delete(PlayerSession).where(PlayerSession.player_id.in_(player_ids)))
+    db.execute(delete(PlayerDailyStats).where(PlayerDailyStats.player_id.in_(player_ids)))
+    db.execute(delete(Player).where(Player.name.like(f"{BENCH_PLAYER_PREFIX}%")))
+    db.commit()
+    _drop_caches(None)
+
+
+def _drop_caches(player_id) -> None:
+    _top_players_snapshot.clear()
+    try:
+        redis_client.delete("leaderboard:top:10", *([f"player:{player_id}:last_sessions:10"] if player_id else []))
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        pass  # Redis unavailable, nothing cached there
+
+
+def benchmarks(ctx: dict) -> dict:
+    """name -> callable that takes the db session and returns the coroutine to time."""
+    return {
+        "get_random_question_by_game": lambda db: get_random_question_by_game(db, ctx["game_id"], ctx["session_id"]),
+        "should_advance_stage": lambda db: should_advance_stage(db, ctx["player_id"], current_stage=1),
+        "get_top_players": lambda db: get_top_players(db, limit=10),
+        "get_player_rank": lambda db: get_player_rank(db, ctx["player_id"]),
+        "get_player_trends_by_period": lambda db: get_player_trends_by_period(db, ctx["player_id"], "week"),
+        "get_last_player_sessions": lambda db: get_last_player_sessions(db, ctx["player_id"]),
+    }
+
+
+async def time_function(db, call, player_id: int) -> dict:
+    statements = 0
+
+    def count_statement(*_args):
+        nonlocal statements
+        statements += 1
+
+    _drop_caches(player_id)
+    await call(db)  # warm-up: plan cache, connection
+    timings = []
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        for _ in range(RUNS):
+            _drop_caches(player_id)
+            db.expire_all()
+            started = time.perf_counter()
+            await call(db)
+            timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    timings.sort()
+    return {
+        "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "best_ms": round(timings[0] * 1000, 3),
+        "statements": statements // RUNS,
+    }
+
+
+async def run_benchmarks(sizes: list[int]) -> dict:
+    results: dict = {}
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        for size in sizes:
+            log.info(f"Seeding {size} answers...")
+            started = time.perf_counter()
+            ctx = seed(db, size)
+            log.info(f"Seeded {ctx['players']} players / {ctx['sessions']} sessions "
+                     f"in {time.perf_counter() - started:.1f}s")
+            results[str(size)] = {}
+            for name, call in benchmarks(ctx).items():
+                result = await time_function(db, call, ctx["player_id"])
+                results[str(size)][name] = result
+                log.info(f"{size:>9} answers  {name:<28} median {result['median_ms']:.2f}ms  "
+                         f"best {result['best_ms']:.2f}ms  {result['statements']} statements")
+            cleanup(db)
+    finally:
+        db.close()
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for size, functions in results.items():
+        for name, result in functions.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            slower_ms = result["median_ms"] - before["median_ms"]
+            if slower_ms > NOISE_FLOOR_MS and result["median_ms"] > before["median_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{name} @ {size} answers: median {before['median_ms']:.2f}ms -> {result['median_ms']:.2f}ms"
+                )
+            if result["statements"] > before["statements"]:
+                regressions.append(
+                    f"{name} @ {size} answers: {before['statements']} -> {result['statements']} statements"
+                )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark hot DAL functions on seeded datasets.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated player_answers row counts")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown ratio (0.2 = 20%%)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(run_benchmarks([int(size) for size in args.sizes.split(",")]))
+
+    if args.save_baseline or not args.baseline.exists():
+        args.baseline.write_text(json.dumps(
+            {"recorded_at": datetime.now().isoformat(timespec="seconds"), "results": results}, indent=2
+        ))
+        log.info(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    regressions = find_regressions(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+    for regression in regressions:
+        log.warning(f"Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+    log.info("No regressions against the baseline")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark get_player_trends_by_period against a seeded heavy player.
+Seeds one player with many completed sessions and answers, times the trends
+query for week and month grouping, reports the SQL statement count, then
+removes the seeded data.
+
+Usage: python scripts/benchmark_player_trends.py [num_sessions] [answers_per_session]
+"""
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, delete, select
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from infra.database import SessionLocal, engine
+from models import Player, Game, PlayerSession, PlayerAnswer, Question, PlayerDailyStats
+from dal.player_trends_dal import get_player_trends_by_period
+from dal.player_daily_stats_dal import rollup_sessions
+from infra.logger import log
+
+BENCH_PLAYER_NAME = "__bench_trends__"
+INSERT_BATCH_SIZE = 5000
+RUNS = 5
+
+
+def seed(db, num_sessions: int, answers_per_session: int) -> int:
+    game = db.query(Game).first()
+    question = db.query(Question).first()
+    if not game or not question:
+        raise RuntimeError("Need at least one game and question - start the app once to seed them")
+
+    player = Player(name=BENCH_PLAYER_NAME, age=7, password="x", excluded_from_leaderboard=True)
+    db.add(player)
+    db.commit()
+
+    now = datetime.now()
+    sessions = [
+        {
+            "player_id": player.id,
+            "game_id": game.id,
+            "score": random.randint(0, 10),
+            "stage": random.randint(1, 5),
+            "started_at": now - timedelta(days=random.randint(0, 365)),
+        }
+        for _ in range(num_sessions)
+    ]
+    for s in sessions:
+        s["ended_at"] = s["started_at"] + timedelta(minutes=10)
+    db.execute(PlayerSession.__table__.insert(), sessions)
+    db.commit()
+
+    session_ids = db.scalars(select(PlayerSession.id).where(PlayerSession.player_id == player.id)).all()
+    batch = []
+    for session_id in session_ids:
+        for _ in range(answers_per_session):
+            batch.append({
+                "session_id": session_id,
+                "question_id": question.id,
+                "player_answer": 0,
+                "is_correct": random.random() > 0.3,
+            })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                db.execute(PlayerAnswer.__table__.insert(), batch)
+                batch.clear()
+    if batch:
+        db.execute(PlayerAnswer.__table__.insert(), batch)
+    db.commit()
+
+    # Benchmark the steady state: every seeded session already in player_daily_stats
+    rollup_sessions(db, PlayerSession.player_id == player.id)
+    db.commit()
+    return player.id
+
+
+def cleanup(db, player_id: int) -> None:
+    session_ids = select(PlayerSession.id).where(PlayerSession.player_id == player_id)
+    db.execute(delete(PlayerAnswer).where(PlayerAnswer.session_id.in_(session_ids)))
+    db.execute(delete(PlayerSession).where(PlayerSession.player_id == player_id))
+    db.execute(delete(PlayerDailyStats).where(PlayerDailyStats.player_id == player_id))
+    db.execute(delete(Player).where(Player.id == player_id))
+    db.commit()
+
+
+async def run_benchmark(num_sessions: int, answers_per_session: int) -> None:
+    db = SessionLocal()
+    statements = 0
+
+    def count_statement(*_args):
+        nonlocal statements
+        statements += 1
+
+    try:
+        stale = db.query(Player).filter(Player.name == BENCH_PLAYER_NAME).first()
+        if stale:
+            cleanup(db, stale.id)
+
+        log.info(f"Seeding {num_sessions} sessions x {answers_per_session} answers...")
+        player_id = seed(db, num_sessions, answers_per_session)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            for period_type in ("week", "month"):
+                statements = 0
+                timings = []
+                for _ in range(RUNS):
+                    started = time.perf_counter()
+                    trends = await get_player_trends_by_period(db, player_id, period_type)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                log.info(
+                    f"{period_type}: {len(trends)} periods, "
+                    f"median {timings[len(timings) // 2] * 1000:.1f}ms, "
+                    f"best {timings[0] * 1000:.1f}ms, "
+                    f"{statements // RUNS} statements per call"
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+        cleanup(db, player_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    num_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    answers_per_session = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(run_benchmark(num_sessions, answers_per_session))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Build optimized image assets for the static images (dinosaurs etc.).
+For every static/*.png writes resized WebP, AVIF (when Pillow supports it) and
+optimized PNG variants with content-hashed filenames into static/dist, plus
+static/dist/manifest.json that maps the original path to the variants.
+The app serves static/dist with immutable caching and resolves
+Dinosaur.image_path through the manifest (to the WebP variant; browsers that
+accept AVIF get the AVIF one from the same URL).
+
+Usage: python scripts/build_image_assets.py [max_size_px]
+"""
+import hashlib
+import io
+import json
+import shutil
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from infra.logger import log
+from infra.static_assets import DIST_URL_PREFIX
+
+SOURCE_DIR = project_root / "static"
+DIST_DIR = project_root / "static" / "dist"
+MAX_SIZE = 512  # px, longest side - dinosaurs are shown at most ~175px high, this covers 2x/3x screens
+HASH_LENGTH = 10
+WEBP_QUALITY = 80
+AVIF_QUALITY = 55
+
+
+def _hashed_name(stem: str, data: bytes, extension: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}.{extension}"
+
+
+def _encode(image, image_format: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def build(max_size: int) -> dict:
+    try:
+        from PIL import Image, features
+    except ImportError:
+        raise SystemExit("Pillow is required for the asset build: pip install -r requirements.txt")
+
+    encoders = {
+        "webp": ("WEBP", {"quality": WEBP_QUALITY, "method": 6}),
+        "png": ("PNG", {"optimize": True}),
+    }
+    if features.check("avif"):
+        encoders["avif"] = ("AVIF", {"quality": AVIF_QUALITY})
+    else:
+        log.warning("Pillow was built without AVIF support, skipping AVIF variants")
+
+    # Rebuild from scratch so stale hashes never linger
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest = {}
+    for source in sorted(SOURCE_DIR.glob("*.png")):
+        with Image.open(source) as image:
+            image = image.convert("RGBA")
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            variants = {}
+            for extension, (image_format, options) in encoders.items():
+                data = _encode(image, image_format, **options)
+                name = _hashed_name(source.stem, data, extension)
+                (DIST_DIR / name).write_bytes(data)
+                variants[extension] = f"{DIST_URL_PREFIX}/{name}"
+        manifest[f"/static/{source.name}"] = variants
+        sizes = ", ".join(f"{ext} {(DIST_DIR / Path(url).name).stat().st_size // 1024}KB" for ext, url in variants.items())
+        log.info(f"{source.name} ({source.stat().st_size // 1024}KB) -> {sizes}")
+
+    (DIST_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    log.info(f"Wrote {len(manifest)} images to {DIST_DIR}")
+    return manifest
+
+
+if __name__ == "__main__":
+    build(int(sys.argv[1]) if len(sys.argv) > 1 else MAX_SIZE)
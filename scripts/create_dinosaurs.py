@@ -84,6 +84,9 @@ def create_dinosaurs():
         # הצג סיכום
         total = db.query(Dinosaur).count()
         log.info(f"סה\"כ דינוזאורים ב-DB: {total}")
+        if created_count or updated_count:
+            # השרת מחזיק עותק של הקטלוג בזיכרון - צריך לרענן אותו
+            log.info("Running server keeps an in-memory catalog: POST /admin/dinosaurs/reload (or restart) to pick up the changes")
         
     except Exception as e:
         db.rollback()
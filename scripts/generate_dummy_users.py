@@ -2,10 +2,25 @@
 """
 Script to generate dummy users with game sessions and statistics.
 Creates 20 users with various game sessions and answers.
+
+Bulk mode (--bulk N) generates N players with realistic session and answer
+histories for performance testing: rows are streamed with Postgres COPY in
+chunks, spread over worker processes, all sharing one precomputed password hash.
+
+Usage:
+    python scripts/generate_dummy_users.py [num_users]
+    python scripts/generate_dummy_users.py --bulk 1000000 [--workers 8] [--seed 42]
 """
+import argparse
 import asyncio
+import csv
+import io
+import math
+import multiprocessing
+import os
 import random
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 import bcrypt
@@ -15,13 +30,14 @@ from sqlalchemy.orm import Session
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from infra.database import SessionLocal
+from infra.database import SessionLocal, engine
 from models import Player, Game, PlayerSession, PlayerAnswer, Question
 from dal.player_dal import create_player
 from dal.game_dal import get_game_by_name, create_game
 from dal.player_session_dal import create_player_session, end_session
 from dal.player_answer_dal import update_player_answer
 from dal.question_dal import create_question, get_question_by_id
+from dal.admin_summary_dal import invalidate_summary_counters
 from infra.logger import log
 
 
@@ -231,8 +247,178 @@ async def generate_dummy_users(num_users: int = 20):
         db.close()
 
 
+# --- Bulk mode -------------------------------------------------------------
+
+BULK_NAME_PREFIX = "bulk_"
+BULK_PASSWORD = "123456"
+BULK_CHUNK_PLAYERS = 2000         # players generated and COPYed per transaction
+BULK_HISTORY_DAYS = 365
+BULK_MAX_SESSIONS_PER_PLAYER = 300
+BULK_MAX_ANSWERS_PER_SESSION = 40
+BULK_ABANDON_RATE = 0.15          # sessions left open (kid closed the tab)
+# Kids mostly play during and right after school hours
+BULK_HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 2, 6, 8, 8, 7, 5, 6, 8, 9, 9, 8, 7, 5, 3, 1, 0, 0]
+BULK_WINNING_SCORES = ([2, 3, 5, 10], [70, 10, 15, 5])  # per-session targets: mostly the default
+
+
+def _bulk_session_start(rng: random.Random, first_day: datetime, now: datetime) -> datetime:
+    span_days = max((now - first_day).days, 1)
+    day = first_day + timedelta(days=rng.randrange(span_days))
+    if day.weekday() >= 5 and rng.random() < 0.6:  # fewer games at weekends
+        day -= timedelta(days=day.weekday() - 4)
+    hour = rng.choices(range(24), weights=BULK_HOUR_WEIGHTS)[0]
+    started_at = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+    return max(first_day, min(started_at, now))  # never before the player signed up
+
+
+def _bulk_generate_chunk(task: tuple) -> tuple[int, int, int]:
+    """Generate one chunk of players with their sessions and answers and COPY it in one transaction."""
+    chunk_index, num_players, game_id, questions, password_hash, seed, now = task
+    rng = random.Random(seed * 1_000_003 + chunk_index) if seed is not None else random.Random()
+    by_difficulty: dict[int, list] = {}
+    for question in questions:
+        by_difficulty.setdefault(question[2], []).append(question)
+
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT nextval(pg_get_serial_sequence('players', 'id')) FROM generate_series(1, %s)",
+                       (num_players,))
+        player_ids = [row[0] for row in cursor.fetchall()]
+
+        # Heavy-tailed activity: most kids play a handful of games, a few play hundreds
+        session_counts = [
+            min(BULK_MAX_SESSIONS_PER_PLAYER, 1 + int(rng.lognormvariate(1.3, 1.1))) for _ in player_ids
+        ]
+        cursor.execute("SELECT nextval(pg_get_serial_sequence('player_sessions', 'id')) FROM generate_series(1, %s)",
+                       (sum(session_counts),))
+        session_ids = iter(row[0] for row in cursor.fetchall())
+
+        players_buf, sessions_buf, answers_buf = io.StringIO(), io.StringIO(), io.StringIO()
+        players_csv, sessions_csv, answers_csv = csv.writer(players_buf), csv.writer(sessions_buf), csv.writer(answers_buf)
+        total_answers = 0
+        for player_id, num_sessions in zip(player_ids, session_counts):
+            first_day = now - timedelta(days=rng.randrange(1, BULK_HISTORY_DAYS))
+            players_csv.writerow([player_id, f"{BULK_NAME_PREFIX}{player_id}", rng.randint(5, 12),
+                                  password_hash, "f", first_day.isoformat()])
+
+            skill = rng.betavariate(5, 2)  # share of correct answers at stage 1, ~0.7 on average
+            stage, completed_at_stage = 1, []
+            starts = sorted(_bulk_session_start(rng, first_day, now) for _ in range(num_sessions))
+            for index, started_at in enumerate(starts):
+                session_id = next(session_ids)
+                winning_score = rng.choices(*BULK_WINNING_SCORES)[0]
+                pool = by_difficulty.get(stage) or questions
+                accuracy = max(0.2, skill - 0.05 * (stage - 1))
+                score = answered = correct = 0
+                answered_at = started_at
+                while score < winning_score and answered < BULK_MAX_ANSWERS_PER_SESSION:
+                    question_id, correct_answer, _ = rng.choice(pool)
+                    is_correct = rng.random() < accuracy
+                    player_answer = correct_answer if is_correct else abs(correct_answer + rng.choice([-2, -1, 1, 2]))
+                    answered_at += timedelta(seconds=rng.uniform(5, 40))
+                    answers_csv.writerow([session_id, question_id, player_answer, "t" if is_correct else "f",
+                                          answered_at.isoformat()])
+                    # Same rule as update_score_and_stage_player_session: a wrong answer costs a point
+                    score = score + 1 if is_correct else max(0, score - 1)
+                    correct += is_correct
+                    answered += 1
+                total_answers += answered
+
+                abandoned = index == num_sessions - 1 and rng.random() < BULK_ABANDON_RATE
+                ended_at = "" if abandoned else (answered_at + timedelta(seconds=rng.uniform(2, 20))).isoformat()
+                sessions_csv.writerow([session_id, player_id, game_id, score, stage, winning_score,
+                                       started_at.isoformat(), ended_at])
+
+                # Same rule as should_advance_stage: at least 3 completed sessions at this stage
+                # and >= 75% correct over the last 5 of them move the kid up
+                if not abandoned:
+                    completed_at_stage.append((correct, answered))
+                    recent = completed_at_stage[-5:]
+                    if (len(recent) >= 3 and stage < 5
+                            and sum(c for c, _ in recent) / sum(a for _, a in recent) >= 0.75):
+                        stage, completed_at_stage = stage + 1, []
+
+        for table, columns, buf in (
+            ("players", "id, name, age, password, excluded_from_leaderboard, created_at", players_buf),
+            ("player_sessions", "id, player_id, game_id, score, stage, winning_score, started_at, ended_at",
+             sessions_buf),
+            ("player_answers", "session_id, question_id, player_answer, is_correct, answered_at", answers_buf),
+        ):
+            buf.seek(0)
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buf)
+        conn.commit()
+        return num_players, sum(session_counts), total_answers
+    finally:
+        conn.close()
+
+
+def _bulk_worker_init() -> None:
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+
+async def generate_bulk_dataset(num_players: int, workers: int, seed: int | None = None):
+    """Generate num_players players plus their sessions and answers via COPY."""
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("Bulk mode streams rows with COPY and needs PostgreSQL")
+
+    db: Session = SessionLocal()
+    try:
+        game = await ensure_game_exists(db)
+        questions = [(q.id, q.correct_answer, q.difficulty or 1) for q in await ensure_questions_exist(db, game.id)]
+        game_id = game.id
+    finally:
+        db.close()
+    engine.dispose()
+
+    password_hash = bcrypt.hashpw(BULK_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    now = datetime.now().replace(microsecond=0)
+    num_chunks = math.ceil(num_players / BULK_CHUNK_PLAYERS)
+    tasks = [
+        (index, min(BULK_CHUNK_PLAYERS, num_players - index * BULK_CHUNK_PLAYERS),
+         game_id, questions, password_hash, seed, now)
+        for index in range(num_chunks)
+    ]
+
+    log.info(f"Generating {num_players} players in {num_chunks} chunks on {workers} worker processes...")
+    started = time.perf_counter()
+    players = sessions = answers = 0
+    with multiprocessing.Pool(workers, initializer=_bulk_worker_init) as pool:
+        for done, (chunk_players, chunk_sessions, chunk_answers) in enumerate(
+            pool.imap_unordered(_bulk_generate_chunk, tasks), start=1
+        ):
+            players += chunk_players
+            sessions += chunk_sessions
+            answers += chunk_answers
+            if done % 10 == 0 or done == num_chunks:
+                elapsed = time.perf_counter() - started
+                log.info(f"{done}/{num_chunks} chunks: {players} players, {sessions} sessions, "
+                         f"{answers} answers ({answers / elapsed:.0f} answers/s)")
+
+    # One invalidation for the whole load instead of one per session
+    try:
+        import redis
+        from infra.redis_client import redis_client
+        for limit in [10, 20, 50, 100]:
+            redis_client.delete(f"leaderboard:top:{limit}")
+    except (redis.ConnectionError, redis.TimeoutError, AttributeError):
+        pass
+    invalidate_summary_counters()
+
+    log.info(f"Bulk load finished in {time.perf_counter() - started:.0f}s. Run ANALYZE, then "
+             f"scripts/backfill_player_daily_stats.py to roll the new sessions up for trends.")
+
+
 if __name__ == "__main__":
-    import sys
-    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20
-    asyncio.run(generate_dummy_users(num_users))
+    parser = argparse.ArgumentParser(description="Generate dummy players with game history.")
+    parser.add_argument("num_users", nargs="?", type=int, default=20)
+    parser.add_argument("--bulk", type=int, metavar="PLAYERS", help="bulk mode: number of players to generate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="bulk mode worker processes")
+    parser.add_argument("--seed", type=int, help="bulk mode random seed, for reproducible datasets")
+    args = parser.parse_args()
+    if args.bulk:
+        asyncio.run(generate_bulk_dataset(args.bulk, args.workers, args.seed))
+    else:
+        asyncio.run(generate_dummy_users(args.num_users))
 
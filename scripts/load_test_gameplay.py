@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Load test simulating a classroom of kids playing the math game.
+Each simulated kid signs up (or reuses its account), logs in, then plays rounds:
+/start -> /answer until the session ends -> /api/game_end -> /player_sessions_stats,
+pausing a random think time between requests. Reports throughput and per-endpoint
+p50/p95/p99 latency and status codes.
+
+Run against the docker-compose stack (docker compose up), e.g.:
+    python scripts/load_test_gameplay.py --kids 30 --rounds 3 --think-time 1.5
+
+All kids come from one IP, like a school behind NAT, so /signup and /login share the
+per-IP budget in infra/rate_limiter.ROUTE_LIMITS; use --ramp-up to spread them out or
+expect 429s (reported separately, and retried after Retry-After).
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+KID_NAME_PREFIX = "loadtest-kid"
+KID_PASSWORD = "loadtest-password"
+MAX_ANSWERS_PER_ROUND = 50   # safety stop if a session never reaches its winning score
+MAX_RATE_LIMIT_RETRIES = 3
+CORRECT_ANSWER_RATE = 0.8    # kids get most questions right
+
+_QUESTION_RE = re.compile(r"(-?\d+)\s*([+\-*/×x÷:])\s*(-?\d+)")
+
+
+@dataclass
+class EndpointStats:
+    latencies: list = field(default_factory=list)  # seconds
+    statuses: defaultdict = field(default_factory=lambda: defaultdict(int))
+    errors: int = 0  # transport errors / timeouts, no status
+
+
+class Recorder:
+    def __init__(self):
+        self.endpoints: defaultdict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(len(stats.latencies) + stats.errors for stats in self.endpoints.values())
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def answer_for(question: str) -> Optional[int]:
+    """Solve "7 + 5 =" style questions; None if the text is not a simple binary operation."""
+    match = _QUESTION_RE.search(question or "")
+    if not match:
+        return None
+    left, op, right = int(match.group(1)), match.group(2), int(match.group(3))
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op in ("*", "×", "x"):
+        return left * right
+    return left // right if right else None
+
+
+class Kid:
+    def __init__(self, index: int, client: httpx.AsyncClient, recorder: Recorder, think_time: float):
+        self.name = f"{KID_NAME_PREFIX}-{index}"
+        self.client = client
+        self.recorder = recorder
+        self.think_time = think_time
+        self.headers: dict = {}
+
+    async def think(self) -> None:
+        if self.think_time > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.think_time)
+
+    async def request(self, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        stats = self.recorder.endpoints[f"{method} {path}"]
+        for _ in range(MAX_RATE_LIMIT_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, headers=self.headers, **kwargs)
+            except httpx.HTTPError:
+                stats.errors += 1
+                return None
+            stats.latencies.append(time.perf_counter() - started)
+            stats.statuses[response.status_code] += 1
+            if response.status_code != 429:
+                return response
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        return response
+
+    async def sign_in(self) -> bool:
+        await self.request("POST", "/signup", json={"name": self.name, "age": 8, "password": KID_PASSWORD})
+        response = await self.request("POST", "/login", data={"username": self.name, "password": KID_PASSWORD})
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def play_round(self) -> None:
+        response = await self.request("POST", "/start", json={})
+        if response is not None and response.status_code == 200 and response.json().get("ready_to_advance"):
+            await self.think()
+            response = await self.request("POST", "/start", json={"advance_stage": True})
+        if response is None or response.status_code != 200:
+            return
+        body = response.json()
+
+        for _ in range(MAX_ANSWERS_PER_ROUND):
+            await self.think()
+            answer = answer_for(body.get("question"))
+            if answer is None or random.random() > CORRECT_ANSWER_RATE:
+                answer = random.randint(0, 100)
+            response = await self.request(
+                "POST", "/answer",
+                json={"answer": answer, "question_id": body["question_id"], "game_name": "Math Game"},
+            )
+            if response is None or response.status_code != 200:
+                return
+            body = response.json()
+            if "redirect" in body:
+                break
+
+        await self.think()
+        await self.request("GET", "/api/game_end")
+        await self.think()
+        await self.request("GET", "/player_sessions_stats")
+
+    async def run(self, rounds: int, start_delay: float) -> None:
+        await asyncio.sleep(start_delay)
+        if not await self.sign_in():
+            return
+        for _ in range(rounds):
+            await self.play_round()
+            await self.think()
+
+
+def report(recorder: Recorder, elapsed: float, kids: int) -> dict:
+    rows = []
+    for endpoint, stats in sorted(recorder.endpoints.items()):
+        latencies = sorted(stats.latencies)
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(latencies) + stats.errors,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            "statuses": dict(sorted(stats.statuses.items())),
+            "errors": stats.errors,
+        })
+    total = recorder.total_requests
+
+    print(f"\n{kids} kids, {total} requests in {elapsed:.1f}s -> {total / elapsed:.1f} req/s\n")
+    print(f"{'endpoint':<28}{'reqs':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  statuses")
+    for row in rows:
+        statuses = " ".join(f"{code}:{count}" for code, count in row["statuses"].items())
+        if row["errors"]:
+            statuses += f" errors:{row['errors']}"
+        print(
+            f"{row['endpoint']:<28}{row['requests']:>7}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+            f"{row['p99_ms']:>9}{row['max_ms']:>9}  {statuses}"
+        )
+    return {"kids": kids, "elapsed_sec": round(elapsed, 2), "requests": total,
+            "throughput_rps": round(total / elapsed, 2), "endpoints": rows}
+
+
+async def run_load_test(args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.kids, max_keepalive_connections=args.kids)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        kids = [Kid(index, client, recorder, args.think_time) for index in range(args.kids)]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            kid.run(args.rounds, start_delay=args.ramp_up * index / max(args.kids, 1))
+            for index, kid in enumerate(kids)
+        ))
+        elapsed = time.perf_counter() - started
+    return report(recorder, elapsed, args.kids)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate a classroom playing the math game.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--kids", type=int, default=30, help="concurrent simulated players")
+    parser.add_argument("--rounds", type=int, default=3, help="games each kid plays")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="mean seconds between a kid's requests (0 = hammer)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which kids join")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = asyncio.run(run_load_test(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
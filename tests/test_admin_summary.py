@@ -0,0 +1,70 @@
+import asyncio
+
+import redis
+
+from dal import admin_summary_dal
+
+
+class _FakePipeline:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, *args))
+
+    async def execute(self):
+        if self.fail:
+            raise redis.ConnectionError("Redis is down")
+        return [1] * len(self.commands)
+
+
+def test_lost_increment_forces_a_reseed_on_the_next_write(monkeypatch):
+    pipelines = []
+
+    def pipeline(transaction=True):
+        pipelines.append(_FakePipeline(fail=len(pipelines) == 0))
+        return pipelines[-1]
+
+    monkeypatch.setattr(admin_summary_dal.async_redis_client, "pipeline", pipeline)
+    monkeypatch.setattr(admin_summary_dal, "_dropped_writes", 0)
+
+    asyncio.run(admin_summary_dal.record_answer(is_correct=True))   # Redis down, increment lost
+    assert admin_summary_dal._dropped_writes == 1
+
+    asyncio.run(admin_summary_dal.record_player_created())          # Redis back
+    assert ("delete", admin_summary_dal.SEEDED_AT_KEY) in pipelines[1].commands
+    assert admin_summary_dal._dropped_writes == 0
+
+    asyncio.run(admin_summary_dal.record_player_created())
+    assert pipelines[2].commands == [("incr", admin_summary_dal.PLAYERS_KEY)]
+
+
+def test_seed_moves_counters_by_delta_and_reuses_the_db_counts(monkeypatch):
+    pipelines = []
+    scans = []
+
+    def pipeline(transaction=True):
+        pipelines.append(_FakePipeline(fail=False))
+        return pipelines[-1]
+
+    async def mget(*keys):
+        return ["7", None, "3", None]  # counters as they stand before the scan
+
+    def compute_from_db(session):
+        scans.append(session)
+        return {"total_players": 5, "total_answers": 40, "correct_answers": 30, "sessions_today": 2,
+                "active_by_day": {}, "active_players": 0}
+
+    monkeypatch.setattr(admin_summary_dal.async_redis_client, "pipeline", pipeline)
+    monkeypatch.setattr(admin_summary_dal.async_redis_client, "mget", mget)
+    monkeypatch.setattr(admin_summary_dal, "_compute_from_db", compute_from_db)
+    monkeypatch.setattr(admin_summary_dal, "_dropped_writes", 1)   # forces the seed
+    monkeypatch.setattr(admin_summary_dal, "_cached_summary", None)
+
+    summary = asyncio.run(admin_summary_dal.get_admin_summary(session="db"))
+
+    increments = [command for command in pipelines[0].commands if command[0] == "incrby"]
+    assert [delta for _, _, delta in increments] == [5 - 7, 40, 30 - 3, 2]
+    assert scans == ["db"]                                            # the DB is counted once
+    assert summary["total_answers"] == 40 and summary["counters_seeded_at"] is not None
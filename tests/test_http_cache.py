@@ -0,0 +1,79 @@
+import asyncio
+from fastapi.testclient import TestClient
+
+from main import app
+from auth_utils import create_access_token
+from infra.database import get_db
+from infra.http_cache import leaderboard_version, dinosaur_catalog_version
+from routes import game_api
+
+client = TestClient(app)
+
+
+def _auth_headers() -> dict:
+    token = asyncio.run(create_access_token({"sub": "etag_user", "player_id": 1}))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_top_players_not_modified_when_etag_matches():
+    headers = {**_auth_headers(), "If-None-Match": leaderboard_version.etag()}
+    res = client.get("/api/top_players", headers=headers)
+    assert res.status_code == 304
+    assert res.headers["ETag"] == leaderboard_version.etag()
+    assert res.content == b""
+
+
+def test_stale_etag_is_not_answered_with_304_after_bump(monkeypatch):
+    async def no_players(db, limit=10):
+        return []
+
+    monkeypatch.setattr(game_api, "get_top_players", no_players)
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: None)  # the 200 path must not need a database
+    stale = leaderboard_version.etag()
+    leaderboard_version.bump()
+    assert leaderboard_version.etag() != stale
+    res = client.get("/api/top_players", headers={**_auth_headers(), "If-None-Match": stale})
+    assert res.status_code == 200
+    assert res.headers["ETag"] == leaderboard_version.etag()
+    # A list containing the current tag still short-circuits
+    headers = {**_auth_headers(), "If-None-Match": f"{stale}, {leaderboard_version.etag()}"}
+    assert client.get("/api/top_players", headers=headers).status_code == 304
+
+
+def test_dinosaur_catalog_not_modified_when_etag_matches():
+    headers = {**_auth_headers(), "If-None-Match": dinosaur_catalog_version.etag()}
+    res = client.get("/dinosaurs/available", headers=headers)
+    assert res.status_code == 304
+    assert "max-age" in res.headers["Cache-Control"]
+
+
+def test_leaderboard_cache_is_dropped_before_the_version_moves(monkeypatch):
+    from dal import player_session_dal
+
+    versions_at_delete = []
+
+    async def delete(*keys):
+        versions_at_delete.append(leaderboard_version.value)
+
+    monkeypatch.setattr(player_session_dal.async_redis_client, "delete", delete)
+    before = leaderboard_version.value
+    asyncio.run(player_session_dal.invalidate_leaderboard())
+    assert versions_at_delete == [before]
+    assert leaderboard_version.value == before + 1
+
+
+def test_dinosaur_catalog_is_served_without_a_db_session(monkeypatch):
+    from dal import dinosaur_dal
+    from dal.dinosaur_dal import DinosaurCatalog
+
+    def no_session():
+        raise AssertionError("the catalog route must not open a DB session")
+
+    catalog = DinosaurCatalog(version=dinosaur_catalog_version.value, dinosaurs=(), by_id={}, available_json=b"[]")
+    monkeypatch.setattr(dinosaur_dal, "_catalog", catalog)
+    monkeypatch.setattr(dinosaur_dal, "SessionLocal", no_session)
+    monkeypatch.setitem(app.dependency_overrides, get_db, no_session)
+
+    res = client.get("/dinosaurs/available", headers=_auth_headers())
+    assert res.status_code == 200
+    assert res.json() == []
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from infra import logger as logger_module
+from infra.logger import RateSampler
+
+
+def _record(level_no: int = 20, **extra) -> dict:
+    return {"level": SimpleNamespace(no=level_no), "extra": extra, "name": "tests.test_logger", "line": 1}
+
+
+def test_sampler_passes_the_first_records_of_each_window_and_drops_the_rest(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: now[0])
+    sampler = RateSampler(per_window=3, window_sec=10)
+
+    assert [sampler(_record()) for _ in range(5)] == [True, True, True, False, False]
+
+    now[0] += 10
+    record = _record()
+    assert sampler(record)
+    assert record["extra"]["sampled_out"] == 2
+
+
+def test_sampler_keys_are_independent(monkeypatch):
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: 100.0)
+    sampler = RateSampler(per_window=1, window_sec=10)
+
+    assert sampler(_record(sample_key="a"))
+    assert not sampler(_record(sample_key="a"))
+    assert sampler(_record(sample_key="b"))
+
+
+def test_sampler_never_drops_warnings_and_errors(monkeypatch):
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: 100.0)
+    sampler = RateSampler(per_window=1, window_sec=10)
+
+    assert sampler(_record())
+    assert not sampler(_record())
+    assert all(sampler(_record(level_no)) for level_no in (30, 40, 50) for _ in range(5))
@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from infra.metrics import Histogram, MetricsMiddleware, HTTP_REQUESTS, render_metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test.", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe("/answer", value=value)
+
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{route="/answer",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/answer",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/answer",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{route="/answer"} 3' in lines
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    before = HTTP_REQUESTS.value("GET", "/items/{item_id}", "200")
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert HTTP_REQUESTS.value("GET", "/items/{item_id}", "200") == before + 2
+    assert 'route="/items/{item_id}"' in render_metrics()
+
+
+def test_rate_limited_requests_are_labelled_by_their_rule(monkeypatch):
+    from infra import rate_limiter
+    from infra.rate_limiter import RateLimitMiddleware, RateLimitResult
+
+    async def rejected(key, limit, client=None):
+        return RateLimitResult(False, limit.limit, 0, 1000)
+
+    monkeypatch.setattr(rate_limiter, "limit_request", rejected)
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/admin/export/players")
+    async def export():
+        return {}
+
+    before = HTTP_REQUESTS.value("GET", "/admin/export/*", "429")
+    assert TestClient(app).get("/admin/export/players").status_code == 429
+    assert HTTP_REQUESTS.value("GET", "/admin/export/*", "429") == before + 1
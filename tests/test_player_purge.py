@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from dal import player_purge_dal
+from dal.player_purge_dal import create_purge_job, get_purge_job
+
+
+def test_only_finished_jobs_are_evicted(monkeypatch):
+    monkeypatch.setattr(player_purge_dal, "MAX_PURGE_JOBS", 2)
+    monkeypatch.setattr(player_purge_dal, "_jobs", type(player_purge_dal._jobs)())
+
+    running = create_purge_job([1])
+    finished = create_purge_job([2])
+    finished.finished_at = datetime.now(timezone.utc)
+
+    newest = create_purge_job([3])
+    assert newest is not None
+    assert get_purge_job(running.id) is running   # still polled mid-purge
+    assert get_purge_job(finished.id) is None
+
+    assert create_purge_job([4]) is None           # every kept job is still active
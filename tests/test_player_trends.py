@@ -0,0 +1,18 @@
+from datetime import date, datetime
+
+from dal.player_trends_dal import _full_days
+
+
+def test_full_days_for_whole_day_range():
+    first, last = _full_days(datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59, 59, 999999))
+    assert (first, last) == (date(2024, 1, 1), date(2024, 1, 31))
+
+
+def test_full_days_excludes_partial_edge_days():
+    first, last = _full_days(datetime(2024, 1, 1, 8), datetime(2024, 1, 31, 12))
+    assert (first, last) == (date(2024, 1, 2), date(2024, 1, 30))
+
+
+def test_full_days_empty_for_range_within_one_day():
+    first, last = _full_days(datetime(2024, 1, 1, 8), datetime(2024, 1, 1, 20))
+    assert first > last
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth_utils import create_access_token
+from infra.profiling import ProfilingMiddleware, get_profile
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/slow")
+    def slow():
+        deadline = time.perf_counter() + 0.05
+        data = []
+        while time.perf_counter() < deadline:
+            data.append(bytearray(1024))
+        return {"items": len(data)}
+
+    return app
+
+
+def _busy_elsewhere(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_admin_request_is_profiled_without_other_threads():
+    token = asyncio.run(create_access_token({"sub": "admin", "role": "admin"}))
+    stop = threading.Event()
+    neighbour = threading.Thread(target=_busy_elsewhere, args=(stop,))
+    neighbour.start()
+    try:
+        res = TestClient(_app()).get("/slow", headers={"X-Profile": "1", "Authorization": f"Bearer {token}"})
+    finally:
+        stop.set()
+        neighbour.join()
+    profile = get_profile(res.headers["X-Profile-Id"])
+    assert profile.status == 200 and profile.samples > 0
+    assert "test_profiling.py:slow" in profile.collapsed()
+    assert "_busy_elsewhere" not in profile.collapsed()
+    assert not profile.traced_memory and not profile.allocations
+
+
+def test_memory_mode_records_allocations():
+    token = asyncio.run(create_access_token({"sub": "admin", "role": "admin"}))
+    res = TestClient(_app()).get("/slow", headers={"X-Profile": "memory", "Authorization": f"Bearer {token}"})
+    profile = get_profile(res.headers["X-Profile-Id"])
+    assert profile.traced_memory and profile.allocations
+
+
+def test_non_admin_and_plain_requests_are_not_profiled():
+    client = TestClient(_app())
+    token = asyncio.run(create_access_token({"sub": "1", "player_id": 1}))
+    assert "X-Profile-Id" not in client.get("/slow").headers
+    res = client.get("/slow", headers={"X-Profile": "1", "Authorization": f"Bearer {token}"})
+    assert "X-Profile-Id" not in res.headers
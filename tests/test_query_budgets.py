@@ -0,0 +1,391 @@
+"""
+Per-route upper bounds on SQL statements and Redis commands, so the N+1 fixes in
+the game, dinosaur and admin paths cannot silently regress.
+
+Every API route must have a budget (test_every_route_has_a_budget). The budgets are
+checked against the local Postgres and Redis (docker compose up db redis), like
+test_rate_limit.py; when Postgres is not reachable those tests are skipped. Each
+request is measured cold: Redis is flushed and the in-process leaderboard and
+summary caches are cleared first, so cache misses and refills count too.
+"""
+import asyncio
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+from urllib.parse import urlsplit
+
+import bcrypt
+import pytest
+import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event, select
+from sqlalchemy.exc import OperationalError
+
+# Configure DB env vars for tests (local run, not inside Docker)
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_USER", "postgres")
+os.environ.setdefault("DB_PASSWORD", "postgres")
+os.environ.setdefault("DB_NAME", "tommy_game_db")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("REDIS_PORT", "6379")
+
+from main import app
+from auth_utils import ADMIN_USERNAME, ADMIN_PASSWORD, create_access_token
+from dal.admin_summary_dal import invalidate_summary_counters
+from dal.player_purge_dal import create_purge_job
+from dal.player_session_dal import _top_players_snapshot
+from infra.database import SessionLocal, engine, create_tables, normalize_sql
+from infra.rate_limiter import route_limit
+from infra.redis_client import redis_client
+from models import Dinosaur, Game, Player, PlayerAnswer, PlayerDailyStats, PlayerSession, Question, player_dinosaurs
+from routes.game_api import GameInfo, MATH_QUESTIONS_FILE
+from scripts.init_math_game import insert_math_stock_questions
+
+NAME_PREFIX = "__qbudget_"
+PASSWORD = "budget-password"
+# The rate limiter's sliding-window script: EVALSHA, plus SCRIPT LOAD and a retry on a cold script cache
+RATE_LIMIT_COMMANDS = 3
+
+
+@dataclass(frozen=True)
+class Budget:
+    sql: int    # statements per request
+    redis: int  # commands per request, not counting the rate limiter
+
+
+# Current cost of each route plus a little headroom. An N+1 over a player's
+# sessions or answers adds 5-10 statements and trips these.
+ROUTE_BUDGETS: dict[str, Budget] = {
+    # Game
+    "POST /start": Budget(26, 7),      # should_advance_stage runs twice (readiness check + create_player_session)
+    "POST /answer": Budget(15, 4),
+    "GET /api/game_end": Budget(9, 5),
+    "GET /player_sessions_stats": Budget(7, 5),
+    "GET /api/top_players": Budget(3, 3),
+    "GET /api/current_game_state": Budget(4, 3),
+    "POST /set_game_settings": Budget(9, 3),
+    # Auth
+    "GET /api/player_info": Budget(0, 0),
+    "POST /signup": Budget(4, 3),
+    "POST /login": Budget(3, 3),
+    "POST /logout": Budget(0, 0),
+    # Dinosaurs
+    "GET /dinosaurs/available": Budget(1, 0),
+    "GET /dinosaurs/my-collection": Budget(4, 3),
+    "GET /dinosaurs/selected": Budget(3, 3),
+    "POST /dinosaurs/unlock": Budget(4, 3),
+    "POST /dinosaurs/select": Budget(4, 3),
+    # Admin
+    "POST /admin/login": Budget(0, 0),
+    "GET /admin/summary": Budget(7, 36),  # cold: seeds the Redis counters (7 days of HyperLogLogs)
+    "GET /admin/players": Budget(4, 0),
+    "GET /admin/players/stats": Budget(6, 0),
+    "GET /admin/players/{player_id}/stats": Budget(6, 3),
+    "GET /admin/players/{player_id}/trends": Budget(4, 0),
+    "GET /admin/players/{player_id}/compare": Budget(4, 0),
+    "DELETE /admin/players/{player_id}": Budget(10, 3),
+    "POST /admin/players/purge": Budget(7, 0),  # includes the background purge run
+    "GET /admin/players/purge/{job_id}": Budget(0, 0),
+    "POST /admin/players/{player_id}/exclude-from-leaderboard": Budget(6, 2),
+    "POST /admin/players/{player_id}/include-in-leaderboard": Budget(6, 2),
+    "POST /admin/dinosaurs/reload": Budget(3, 0),
+    "GET /admin/slow-queries": Budget(0, 0),
+    "DELETE /admin/slow-queries": Budget(0, 0),
+    "GET /admin/profiles": Budget(0, 0),
+    "GET /admin/profiles/{profile_id}": Budget(0, 0),
+    "GET /admin/profiles/{profile_id}/collapsed": Budget(0, 0),
+    "GET /admin/export/{entity}": Budget(2, 0),
+    # Pages and metrics
+    "GET /": Budget(0, 0),
+    "GET /login": Budget(0, 0),
+    "GET /signup": Budget(0, 0),
+    "GET /game": Budget(0, 0),
+    "GET /player_stats": Budget(0, 0),
+    "GET /top_players": Budget(0, 0),
+    "GET /admin/login": Budget(0, 0),
+    "GET /admin": Budget(0, 0),
+    "GET /metrics": Budget(0, 0),
+}
+
+
+@dataclass
+class Call:
+    method: str
+    url: str
+    status: int = 200
+    kwargs: dict = field(default_factory=dict)
+
+
+def _page(path: str) -> Callable[[dict], Call]:
+    # 503 when the React build is missing, which does not change the cost
+    return lambda ctx: Call("GET", path, status=200 if os.path.exists("static/react/index.html") else 503)
+
+
+REQUESTS: dict[str, Callable[[dict], Call]] = {
+    "POST /start": lambda ctx: Call("POST", "/start", kwargs={"json": {}, "headers": ctx["player"]}),
+    "POST /answer": lambda ctx: Call("POST", "/answer", kwargs={"headers": ctx["player"], "json": {
+        "answer": -1, "question_id": ctx["question_id"], "game_name": GameInfo.MATH_GAME.name,
+    }}),
+    "GET /api/game_end": lambda ctx: Call("GET", "/api/game_end", kwargs={"headers": ctx["player"]}),
+    "GET /player_sessions_stats": lambda ctx: Call("GET", "/player_sessions_stats", kwargs={"headers": ctx["player"]}),
+    "GET /api/top_players": lambda ctx: Call("GET", "/api/top_players", kwargs={"headers": ctx["player"]}),
+    "GET /api/current_game_state": lambda ctx: Call("GET", "/api/current_game_state",
+                                                    kwargs={"headers": ctx["player"]}),
+    "POST /set_game_settings": lambda ctx: Call("POST", "/set_game_settings", kwargs={
+        "headers": ctx["player"], "json": {"difficulty": 1, "winning_score": 10},
+    }),
+    "GET /api/player_info": lambda ctx: Call("GET", "/api/player_info", kwargs={"headers": ctx["player"]}),
+    "POST /signup": lambda ctx: Call("POST", "/signup", kwargs={"json": {
+        "name": f"{NAME_PREFIX}signup", "age": 8, "password": PASSWORD,
+    }}),
+    "POST /login": lambda ctx: Call("POST", "/login", kwargs={"data": {
+        "username": ctx["player_name"], "password": PASSWORD,
+    }}),
+    "POST /logout": lambda ctx: Call("POST", "/logout", status=302, kwargs={"follow_redirects": False}),
+    "GET /dinosaurs/available": lambda ctx: Call("GET", "/dinosaurs/available", kwargs={"headers": ctx["player"]}),
+    "GET /dinosaurs/my-collection": lambda ctx: Call("GET", "/dinosaurs/my-collection",
+                                                     kwargs={"headers": ctx["player"]}),
+    "GET /dinosaurs/selected": lambda ctx: Call("GET", "/dinosaurs/selected", kwargs={"headers": ctx["player"]}),
+    "POST /dinosaurs/unlock": lambda ctx: Call("POST", "/dinosaurs/unlock", kwargs={
+        "headers": ctx["player"], "json": {"dinosaur_id": ctx["dinosaur_id"]},
+    }),
+    "POST /dinosaurs/select": lambda ctx: Call("POST", "/dinosaurs/select", kwargs={
+        "headers": ctx["player"], "json": {"dinosaur_id": ctx["dinosaur_id"]},
+    }),
+    "POST /admin/login": lambda ctx: Call("POST", "/admin/login", kwargs={"json": {
+        "username": ADMIN_USERNAME, "password": ADMIN_PASSWORD,
+    }}),
+    "GET /admin/summary": lambda ctx: Call("GET", "/admin/summary", kwargs={"headers": ctx["admin"]}),
+    "GET /admin/players": lambda ctx: Call("GET", "/admin/players", kwargs={
+        "headers": ctx["admin"], "params": {"search": NAME_PREFIX},
+    }),
+    "GET /admin/players/stats": lambda ctx: Call("GET", "/admin/players/stats", kwargs={
+        "headers": ctx["admin"], "params": {"ids": [ctx["player_id"], ctx["other_player_id"]]},
+    }),
+    "GET /admin/players/{player_id}/stats": lambda ctx: Call("GET", f"/admin/players/{ctx['player_id']}/stats",
+                                                             kwargs={"headers": ctx["admin"]}),
+    "GET /admin/players/{player_id}/trends": lambda ctx: Call("GET", f"/admin/players/{ctx['player_id']}/trends",
+                                                              kwargs={"headers": ctx["admin"]}),
+    "GET /admin/players/{player_id}/compare": lambda ctx: Call(
+        "GET", f"/admin/players/{ctx['player_id']}/compare", kwargs={"headers": ctx["admin"], "params": {
+            "period": [f"{(ctx['now'] - timedelta(days=60)).isoformat()}/{(ctx['now'] - timedelta(days=30)).isoformat()}",
+                       f"{(ctx['now'] - timedelta(days=30)).isoformat()}/{ctx['now'].isoformat()}"],
+        }},
+    ),
+    "DELETE /admin/players/{player_id}": lambda ctx: Call("DELETE", f"/admin/players/{ctx['doomed_player_id']}",
+                                                          kwargs={"headers": ctx["admin"]}),
+    "POST /admin/players/purge": lambda ctx: Call("POST", "/admin/players/purge", status=202, kwargs={
+        "headers": ctx["admin"], "json": {"player_ids": [-1]},
+    }),
+    "GET /admin/players/purge/{job_id}": lambda ctx: Call("GET", f"/admin/players/purge/{create_purge_job([-1]).id}",
+                                                          kwargs={"headers": ctx["admin"]}),
+    "POST /admin/players/{player_id}/exclude-from-leaderboard": lambda ctx: Call(
+        "POST", f"/admin/players/{ctx['other_player_id']}/exclude-from-leaderboard", kwargs={"headers": ctx["admin"]},
+    ),
+    "POST /admin/players/{player_id}/include-in-leaderboard": lambda ctx: Call(
+        "POST", f"/admin/players/{ctx['other_player_id']}/include-in-leaderboard", kwargs={"headers": ctx["admin"]},
+    ),
+    "POST /admin/dinosaurs/reload": lambda ctx: Call("POST", "/admin/dinosaurs/reload",
+                                                     kwargs={"headers": ctx["admin"]}),
+    "GET /admin/slow-queries": lambda ctx: Call("GET", "/admin/slow-queries", kwargs={"headers": ctx["admin"]}),
+    "DELETE /admin/slow-queries": lambda ctx: Call("DELETE", "/admin/slow-queries", kwargs={"headers": ctx["admin"]}),
+    "GET /admin/profiles": lambda ctx: Call("GET", "/admin/profiles", kwargs={"headers": ctx["admin"]}),
+    "GET /admin/profiles/{profile_id}": lambda ctx: Call("GET", "/admin/profiles/missing", status=404,
+                                                         kwargs={"headers": ctx["admin"]}),
+    "GET /admin/profiles/{profile_id}/collapsed": lambda ctx: Call("GET", "/admin/profiles/missing/collapsed",
+                                                                   status=404, kwargs={"headers": ctx["admin"]}),
+    "GET /admin/export/{entity}": lambda ctx: Call("GET", "/admin/export/sessions", kwargs={
+        "headers": ctx["admin"], "params": {"player_id": ctx["player_id"]},
+    }),
+    "GET /": _page("/"),
+    "GET /login": _page("/login"),
+    "GET /signup": _page("/signup"),
+    "GET /game": _page("/game"),
+    "GET /player_stats": _page("/player_stats"),
+    "GET /top_players": _page("/top_players"),
+    "GET /admin/login": _page("/admin/login"),
+    "GET /admin": _page("/admin"),
+    "GET /metrics": lambda ctx: Call("GET", "/metrics"),
+}
+
+
+@dataclass
+class RequestCost:
+    statements: int = 0
+    redis_commands: int = 0
+    shapes: Counter = field(default_factory=Counter)  # normalized statement -> runs
+
+
+def _counting_command(original, cost: RequestCost):
+    def execute_command(self, *args, **options):
+        cost.redis_commands += 1
+        return original(self, *args, **options)
+    return execute_command
+
+
+def _counting_pipeline(original, cost: RequestCost):
+    def execute(self, *args, **kwargs):
+        cost.redis_commands += len(self.command_stack)
+        return original(self, *args, **kwargs)
+    return execute
+
+
+def _measure(client: TestClient, call: Call, monkeypatch) -> tuple:
+    cost = RequestCost()
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        cost.statements += 1
+        cost.shapes[normalize_sql(statement)] += 1
+
+    # Patch the base clients: the circuit-breaker subclasses call into these, so only
+    # commands that actually go to Redis are counted.
+    with monkeypatch.context() as patch:
+        patch.setattr(redis.Redis, "execute_command", _counting_command(redis.Redis.execute_command, cost))
+        patch.setattr(redis.asyncio.Redis, "execute_command",
+                      _counting_command(redis.asyncio.Redis.execute_command, cost))
+        patch.setattr(redis.client.Pipeline, "execute", _counting_pipeline(redis.client.Pipeline.execute, cost))
+        patch.setattr(redis.asyncio.client.Pipeline, "execute",
+                      _counting_pipeline(redis.asyncio.client.Pipeline.execute, cost))
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            response = client.request(call.method, call.url, **call.kwargs)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+    return response, cost
+
+
+def _reset_caches() -> None:
+    try:
+        redis_client.flushdb()
+    except (redis.ConnectionError, redis.TimeoutError):
+        pass  # Redis unavailable, nothing cached there
+    _top_players_snapshot.clear()
+    invalidate_summary_counters()
+
+
+def _cleanup(db) -> None:
+    player_ids = select(Player.id).where(Player.name.like(f"{NAME_PREFIX}%")).scalar_subquery()
+    session_ids = select(PlayerSession.id).where(PlayerSession.player_id.in_(player_ids))
+    db.execute(delete(PlayerAnswer).where(PlayerAnswer.session_id.in_(session_ids)))
+    db.execute(delete(PlayerSession).where(PlayerSession.player_id.in_(player_ids)))
+    db.execute(delete(PlayerDailyStats).where(PlayerDailyStats.player_id.in_(player_ids)))
+    db.execute(delete(player_dinosaurs).where(player_dinosaurs.c.player_id.in_(player_ids)))
+    db.execute(delete(Player).where(Player.name.like(f"{NAME_PREFIX}%")))
+    db.execute(delete(Dinosaur).where(Dinosaur.name.like(f"{NAME_PREFIX}%")))
+    db.commit()
+
+
+def _add_player(db, name: str, password_hash: str, game: Game, questions: list, completed_sessions: int) -> Player:
+    player = Player(name=f"{NAME_PREFIX}{name}", age=8, password=password_hash)
+    db.add(player)
+    db.flush()
+    now = datetime.now()
+    for index in range(completed_sessions):
+        started_at = now - timedelta(days=index * 3 + 1)
+        session = PlayerSession(player_id=player.id, game_id=game.id, stage=1, score=3, winning_score=3,
+                                started_at=started_at, ended_at=started_at + timedelta(minutes=5))
+        db.add(session)
+        db.flush()
+        # 3 of 5 right: below the 75% needed to advance, so /start always opens a new stage 1 session
+        for answer_index, question in enumerate(questions[:5]):
+            is_correct = answer_index < 3
+            db.add(PlayerAnswer(session_id=session.id, question_id=question.id, is_correct=is_correct,
+                                player_answer=question.correct_answer if is_correct else -1))
+    return player
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    try:
+        create_tables()
+    except (OperationalError, RuntimeError):
+        pytest.skip("Postgres is not reachable (start it with docker compose up db redis)")
+
+    db = SessionLocal()
+    try:
+        _cleanup(db)
+        game = db.query(Game).filter(Game.name == GameInfo.MATH_GAME.name).first()
+        if not game:
+            game = Game(name=GameInfo.MATH_GAME.name, description=GameInfo.MATH_GAME.description,
+                        winning_score=GameInfo.MATH_GAME.winning_score)
+            db.add(game)
+            db.commit()
+        if not db.query(Question).filter(Question.game_id == game.id).count():
+            asyncio.run(insert_math_stock_questions(db, filename=MATH_QUESTIONS_FILE,
+                                                    game_name=GameInfo.MATH_GAME.name))
+        questions = db.query(Question).filter(Question.game_id == game.id).order_by(Question.id).limit(5).all()
+
+        dinosaur = db.query(Dinosaur).order_by(Dinosaur.id).first()
+        if not dinosaur:
+            dinosaur = Dinosaur(name=f"{NAME_PREFIX}dino", image_path="/static/images/dino.png", level="1")
+            db.add(dinosaur)
+            db.flush()
+
+        password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+        player = _add_player(db, "player", password_hash, game, questions, completed_sessions=12)
+        # Latest session is open, with a win target the single /answer call cannot reach
+        db.add(PlayerSession(player_id=player.id, game_id=game.id, stage=1, score=0, winning_score=10))
+        db.execute(player_dinosaurs.insert().values(player_id=player.id, dinosaur_id=dinosaur.id))
+        player.selected_dinosaur_id = dinosaur.id
+        other = _add_player(db, "other", password_hash, game, questions, completed_sessions=3)
+        doomed = _add_player(db, "doomed", password_hash, game, questions, completed_sessions=3)
+        db.commit()
+
+        player_token = asyncio.run(create_access_token({"sub": player.name, "player_id": player.id}))
+        admin_token = asyncio.run(create_access_token({"sub": ADMIN_USERNAME, "role": "admin"}))
+        ctx = {
+            "now": datetime.now().replace(microsecond=0),
+            "player_name": player.name,
+            "player_id": player.id,
+            "other_player_id": other.id,
+            "doomed_player_id": doomed.id,
+            "question_id": questions[0].id,
+            "dinosaur_id": dinosaur.id,
+            "player": {"Authorization": f"Bearer {player_token}"},
+            "admin": {"Authorization": f"Bearer {admin_token}"},
+        }
+        with TestClient(app) as client:  # runs the lifespan: tables, dinosaur catalog
+            yield client, ctx
+    finally:
+        db.rollback()
+        _cleanup(db)
+        db.close()
+        _reset_caches()
+
+
+def test_every_route_has_a_budget():
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    assert routes - ROUTE_BUDGETS.keys() == set(), "add a budget (and a request) for new routes"
+    assert ROUTE_BUDGETS.keys() - routes == set(), "remove budgets of deleted routes"
+    assert REQUESTS.keys() == ROUTE_BUDGETS.keys()
+
+
+@pytest.mark.parametrize("route", list(ROUTE_BUDGETS))
+def test_route_stays_within_query_budget(route, seeded, monkeypatch):
+    client, ctx = seeded
+    call = REQUESTS[route](ctx)
+    budget = ROUTE_BUDGETS[route]
+    redis_budget = budget.redis + (RATE_LIMIT_COMMANDS if route_limit(call.method, urlsplit(call.url).path) else 0)
+
+    _reset_caches()
+    response, cost = _measure(client, call, monkeypatch)
+
+    assert response.status_code == call.status, response.text
+    statements = "\n".join(f"{runs}x {shape[:200]}" for shape, runs in cost.shapes.most_common())
+    assert cost.statements <= budget.sql, (
+        f"{route} ran {cost.statements} SQL statements, budget is {budget.sql}:\n{statements}"
+    )
+    assert cost.redis_commands <= redis_budget, (
+        f"{route} sent {cost.redis_commands} Redis commands, budget is {redis_budget}"
+    )
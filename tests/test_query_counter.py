@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import create_engine, text
+
+from infra import query_counter
+from infra.query_counter import QueryCounterMiddleware, install_query_counter
+
+engine = create_engine("sqlite://")
+install_query_counter(engine)
+
+
+def _app(queries: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware, expose_headers=True)
+
+    @app.get("/items")
+    def items():
+        with engine.connect() as conn:
+            for i in range(queries):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {"ok": True}
+
+    return app
+
+
+def test_counts_statements_per_request():
+    res = TestClient(_app(3)).get("/items")
+    assert res.headers["X-DB-Queries"] == "3"
+    assert float(res.headers["X-DB-Time"]) >= 0
+
+
+def test_warns_on_repeated_statement(monkeypatch):
+    monkeypatch.setattr(query_counter, "REPEATED_STATEMENT_LIMIT", 2)
+    messages = []
+    sink = logger.add(lambda message: messages.append(str(message)), level="WARNING")
+    try:
+        TestClient(_app(3)).get("/items")
+    finally:
+        logger.remove(sink)
+    assert any("Possible N+1 in GET /items" in message for message in messages)
@@ -1,5 +1,8 @@
+import asyncio
 import os
 import pytest
+import redis
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 # Configure DB env vars for tests (local run, not inside Docker)
@@ -13,8 +16,12 @@ os.environ.setdefault("REDIS_HOST", "localhost")
 os.environ.setdefault("REDIS_PORT", "6379")
 
 from main import app
-from infra.rate_limiter import RATE_LIMIT, RATE_LIMIT_MSG
+from infra import rate_limiter
+from infra.rate_limiter import (
+    RATE_LIMIT, RATE_LIMIT_MSG, ROUTE_LIMITS, RateLimit, LocalRateLimiter, RateLimitMiddleware, limit_request,
+)
 from infra.redis_client import redis_client
+from auth_utils import create_access_token
 
 client = TestClient(app)
 
@@ -59,4 +66,83 @@ def test_signup_rate_limit_exceeded():
     # next attempt – should be rate limited
     res = client.post("/signup", json=payload)
     assert res.status_code == 429
-    assert res.json()["detail"] == RATE_LIMIT_MSG
\ No newline at end of file
+    assert res.json()["detail"] == RATE_LIMIT_MSG
+
+class _DownRedis:
+    """Async Redis stand-in whose scripts always fail to connect."""
+
+    def register_script(self, _script):
+        async def call(**_kwargs):
+            raise redis.ConnectionError("down")
+        return call
+
+
+def test_local_fallback_limits_and_stays_bounded():
+    limiter = LocalRateLimiter(max_keys=2)
+    limit = RateLimit(3, 60)
+
+    assert [limiter.hit("ip-a", limit, now=0).allowed for _ in range(4)] == [True, True, True, False]
+    # One token back every window / limit seconds
+    assert limiter.hit("ip-a", limit, now=20).allowed
+
+    limiter.hit("ip-b", limit, now=0)
+    limiter.hit("ip-c", limit, now=0)
+    assert len(limiter) == 2
+
+
+def test_fallback_takes_over_when_redis_is_down():
+    limit = RateLimit(2, 60)
+    results = [asyncio.run(limit_request("fallback-test", limit, _DownRedis())).allowed for _ in range(3)]
+    assert results == [True, True, False]
+
+
+def test_middleware_sets_headers_and_rejects_over_budget(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "local_limiter", LocalRateLimiter())
+
+    limited_app = FastAPI()
+    limited_app.add_middleware(RateLimitMiddleware, client=_DownRedis())
+
+    @limited_app.post("/start")
+    async def start():
+        return {"ok": True}
+
+    @limited_app.get("/unlimited")
+    async def unlimited():
+        return {"ok": True}
+
+    test_client = TestClient(limited_app)
+    limit = ROUTE_LIMITS["POST /start"].limit
+    for remaining in range(limit - 1, -1, -1):
+        res = test_client.post("/start")
+        assert res.status_code == 200
+        assert res.headers["X-RateLimit-Limit"] == str(limit)
+        assert res.headers["X-RateLimit-Remaining"] == str(remaining)
+
+    res = test_client.post("/start")
+    assert res.status_code == 429
+    assert res.json()["detail"] == RATE_LIMIT_MSG
+    assert "Retry-After" in res.headers
+
+    res = test_client.get("/unlimited")
+    assert res.status_code == 200
+    assert "X-RateLimit-Limit" not in res.headers
+
+
+def test_login_budget_is_per_ip_whatever_token_is_sent(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "local_limiter", LocalRateLimiter())
+
+    limited_app = FastAPI()
+    limited_app.add_middleware(RateLimitMiddleware, client=_DownRedis())
+
+    @limited_app.post("/login")
+    async def login():
+        return {"ok": True}
+
+    tokens = [asyncio.run(create_access_token({"sub": str(i), "player_id": i})) for i in (1, 2)]
+    test_client = TestClient(limited_app)
+    statuses = [
+        test_client.post("/login", headers={"Authorization": f"Bearer {tokens[i % 2]}"}).status_code
+        for i in range(ROUTE_LIMITS["POST /login"].limit + 1)
+    ]
+    assert statuses.count(200) == ROUTE_LIMITS["POST /login"].limit
+    assert statuses[-1] == 429
@@ -0,0 +1,117 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+import redis
+
+from infra import redis_client as redis_client_module
+from infra.redis_client import (
+    CircuitBreaker, CircuitOpenError, LoopBoundConnectionPool, _GuardedAsyncRedis, async_redis_client,
+)
+
+
+def test_breaker_opens_after_threshold_and_probes_once(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(redis_client_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=3, cooldown_sec=10)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()       # the single half-open trial call
+    assert not breaker.allow()   # everyone else still short-circuits
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(redis_client_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown_sec=5)
+    breaker.record_failure()
+
+    now[0] += 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_open_circuit_short_circuits_client_calls(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown_sec=60)
+    breaker.record_failure()
+    monkeypatch.setattr(redis_client_module, "redis_breaker", breaker)
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(async_redis_client.get("any-key"))
+
+
+def test_probe_answered_with_an_error_reply_closes_the_circuit(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(redis_client_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown_sec=5)
+    breaker.record_failure()
+    monkeypatch.setattr(redis_client_module, "redis_breaker", breaker)
+
+    async def error_reply(self, *args, **options):
+        raise redis.ResponseError("NOSCRIPT No matching script")
+
+    monkeypatch.setattr(redis.asyncio.Redis, "execute_command", error_reply)
+    now[0] += 5
+    with pytest.raises(redis.ResponseError):
+        asyncio.run(async_redis_client.evalsha("sha", 0))
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_cancelled_probe_lets_the_next_call_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(redis_client_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown_sec=5)
+    breaker.record_failure()
+    monkeypatch.setattr(redis_client_module, "redis_breaker", breaker)
+
+    async def cancelled(self, *args, **options):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(redis.asyncio.Redis, "execute_command", cancelled)
+    now[0] += 5
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(async_redis_client.get("any-key"))
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def _nil_redis_server() -> int:
+    """Minimal RESP server on a free port that answers every command with nil."""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def handle(conn):
+        with conn:
+            while data := conn.recv(4096):
+                conn.sendall(b"$-1\r\n" * data.count(b"*"))  # one reply per command array
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def test_async_client_works_on_successive_event_loops(monkeypatch):
+    monkeypatch.setattr(redis_client_module, "redis_breaker", CircuitBreaker("test", 5, 10))
+    pool = LoopBoundConnectionPool(
+        host="127.0.0.1", port=_nil_redis_server(), decode_responses=True, socket_timeout=2
+    )
+    client = _GuardedAsyncRedis(connection_pool=pool)
+
+    # Each asyncio.run is a new loop; a pool bound to the first one fails on the second
+    assert asyncio.run(client.get("any-key")) is None
+    assert asyncio.run(client.get("any-key")) is None
@@ -0,0 +1,28 @@
+from sqlalchemy import create_engine, event, text
+
+from infra import database
+from infra.database import normalize_sql, get_slow_queries, reset_slow_queries
+
+
+def test_normalize_sql_collapses_whitespace_and_in_lists():
+    statement = "SELECT *\n  FROM players\n WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+    assert normalize_sql(statement) == "SELECT * FROM players WHERE id IN (...)"
+
+
+def test_slow_statements_are_recorded_with_shape_and_caller(monkeypatch):
+    monkeypatch.setattr(database, "SLOW_QUERY_MS", 0.0)  # record everything
+    engine = create_engine("sqlite://")
+    event.listen(engine, "before_cursor_execute", database._before_execute_timer)
+    event.listen(engine, "after_cursor_execute", database._after_execute_slow_query)
+    reset_slow_queries()
+    try:
+        with engine.connect() as conn:
+            for i in range(3):
+                conn.execute(text("SELECT :value"), {"value": i})
+
+        [entry] = [q for q in get_slow_queries() if q["sql"] == "SELECT ?"]
+        assert entry["count"] == 3
+        assert entry["params_shape"] == "(int)"
+        assert entry["caller"].endswith("test_slow_query_log.py:test_slow_statements_are_recorded_with_shape_and_caller")
+    finally:
+        reset_slow_queries()
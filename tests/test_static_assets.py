@@ -0,0 +1,65 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from infra import static_assets
+from infra.static_assets import ImmutableStaticFiles, IMMUTABLE_CACHE_CONTROL, resolve_image_path
+
+
+def test_hashed_assets_are_served_immutable(tmp_path):
+    (tmp_path / "dino_1.abc123.webp").write_bytes(b"RIFF")
+    app = FastAPI()
+    app.mount("/static/dist", ImmutableStaticFiles(directory=str(tmp_path)))
+
+    res = TestClient(app).get("/static/dist/dino_1.abc123.webp")
+    assert res.status_code == 200
+    assert res.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+
+def test_image_path_resolves_to_hashed_variant(tmp_path, monkeypatch):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({
+        "/static/dino_1.png": {"webp": "/static/dist/dino_1.abc123.webp", "png": "/static/dist/dino_1.def456.png"},
+    }))
+    monkeypatch.setattr(static_assets, "MANIFEST_PATH", manifest)
+    static_assets.asset_manifest.cache_clear()
+    try:
+        assert resolve_image_path("/static/dino_1.png") == "/static/dist/dino_1.abc123.webp"
+        assert resolve_image_path("/static/dino_1.png", "avif") == "/static/dist/dino_1.def456.png"
+        assert resolve_image_path("/static/dino_2.png") == "/static/dino_2.png"
+    finally:
+        static_assets.asset_manifest.cache_clear()
+
+
+def test_missing_manifest_keeps_original_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_assets, "MANIFEST_PATH", tmp_path / "missing.json")
+    static_assets.asset_manifest.cache_clear()
+    try:
+        assert resolve_image_path("/static/dino_1.png") == "/static/dino_1.png"
+    finally:
+        static_assets.asset_manifest.cache_clear()
+
+
+def test_avif_is_negotiated_on_accept(tmp_path, monkeypatch):
+    (tmp_path / "dino_1.abc123.webp").write_bytes(b"RIFF")
+    (tmp_path / "dino_1.fed987.avif").write_bytes(b"AVIF")
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({
+        "/static/dino_1.png": {"webp": "/static/dist/dino_1.abc123.webp", "avif": "/static/dist/dino_1.fed987.avif"},
+    }))
+    monkeypatch.setattr(static_assets, "MANIFEST_PATH", manifest)
+    static_assets.asset_manifest.cache_clear()
+    app = FastAPI()
+    app.mount("/static/dist", ImmutableStaticFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+    try:
+        avif = client.get("/static/dist/dino_1.abc123.webp", headers={"Accept": "image/avif,image/webp,*/*"})
+        assert avif.content == b"AVIF" and avif.headers["Content-Type"] == "image/avif"
+        assert avif.headers["Vary"] == "Accept"
+
+        webp = client.get("/static/dist/dino_1.abc123.webp", headers={"Accept": "image/webp,*/*"})
+        assert webp.content == b"RIFF" and webp.headers["Vary"] == "Accept"
+        assert webp.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    finally:
+        static_assets.asset_manifest.cache_clear()